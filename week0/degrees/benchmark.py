@@ -0,0 +1,349 @@
+import argparse
+import csv
+import gc
+import json
+import math
+import os
+import random
+import shutil
+import tempfile
+import time
+import tracemalloc
+
+import degrees
+from graph import StarGraph
+from util import Node, QueueFrontier, SearchStats
+
+
+class ListStackFrontier():
+    """
+    The original list-backed frontier, kept as a baseline to compare against.
+    """
+    def __init__(self):
+        self.frontier = []
+
+    def add(self, node):
+        self.frontier.append(node)
+
+    def contains_state(self, state):
+        return any(node.state == state for node in self.frontier)
+
+    def empty(self):
+        return len(self.frontier) == 0
+
+    def remove(self):
+        if self.empty():
+            raise Exception("empty frontier")
+        else:
+            node = self.frontier[-1]
+            self.frontier = self.frontier[:-1]
+            return node
+
+
+class ListQueueFrontier(ListStackFrontier):
+
+    def remove(self):
+        if self.empty():
+            raise Exception("empty frontier")
+        else:
+            node = self.frontier[0]
+            self.frontier = self.frontier[1:]
+            return node
+
+
+def frontier_shortest_path(source, target, frontier_class):
+    """
+    The original Node and frontier based breadth-first search over
+    neighbors_for_person, kept as a baseline to compare against.
+    """
+    explored = set()
+    start = Node(state=source, parent=None, action=None)
+    frontier = frontier_class()
+    frontier.add(start)
+
+    if start.state == target:
+        return [(None, start.state)]
+
+    while not frontier.empty():
+        node = frontier.remove()
+        explored.add(node.state)
+        for movie_id, person_id in degrees.neighbors_for_person(node.state):
+            if not frontier.contains_state(person_id) and person_id not in explored:
+                child = Node(state=person_id, parent=node, action=movie_id)
+                if child.state == target:
+                    solution = []
+                    while child.parent is not None:
+                        solution.append((child.action, child.state))
+                        child = child.parent
+                    solution.reverse()
+                    return solution
+                frontier.add(child)
+    return None
+
+
+def legacy_load_data(directory):
+    """
+    The original loader, building dicts of dicts of sets of string ids,
+    kept as a baseline to compare against.
+    """
+    names, people, movies = {}, {}, {}
+    with open(f"{directory}/people.csv", encoding="utf-8") as f:
+        reader = csv.DictReader(f)
+        for row in reader:
+            people[row["id"]] = {
+                "name": row["name"],
+                "birth": row["birth"],
+                "movies": set()
+            }
+            if row["name"].lower() not in names:
+                names[row["name"].lower()] = {row["id"]}
+            else:
+                names[row["name"].lower()].add(row["id"])
+
+    with open(f"{directory}/movies.csv", encoding="utf-8") as f:
+        reader = csv.DictReader(f)
+        for row in reader:
+            movies[row["id"]] = {
+                "title": row["title"],
+                "year": row["year"],
+                "stars": set()
+            }
+
+    with open(f"{directory}/stars.csv", encoding="utf-8") as f:
+        reader = csv.DictReader(f)
+        for row in reader:
+            try:
+                people[row["person_id"]]["movies"].add(row["movie_id"])
+                movies[row["movie_id"]]["stars"].add(row["person_id"])
+            except KeyError:
+                pass
+    return names, people, movies
+
+
+def measure_load(label, load):
+    """
+    Runs `load` once for wall time, then again under tracemalloc for the
+    peak and retained memory it allocates, and prints all three.
+    """
+    gc.collect()
+    start = time.perf_counter()
+    result = load()
+    elapsed = time.perf_counter() - start
+    del result
+    gc.collect()
+
+    tracemalloc.start()
+    result = load()
+    retained, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{label:>8}: loaded in {elapsed:.3f}s, "
+          f"peak {peak / 2 ** 20:.1f} MiB, retained {retained / 2 ** 20:.1f} MiB")
+    return result
+
+
+def check_blank_lines(directory):
+    """
+    Checks that the CSR ingest loads a copy of the CSVs with blank lines
+    and a short row in them into the same graph as the original loader,
+    counting the blank and short rows of stars.csv as dropped.
+    """
+    with tempfile.TemporaryDirectory() as temporary:
+        for name in ("people.csv", "movies.csv", "stars.csv"):
+            shutil.copy(os.path.join(directory, name), temporary)
+            with open(os.path.join(temporary, name), "a", encoding="utf-8") as f:
+                f.write("\n")
+        with open(os.path.join(temporary, "stars.csv"), "a", encoding="utf-8") as f:
+            f.write("102\n\n")
+        names, people, movies = legacy_load_data(temporary)
+        graph = StarGraph.from_csv(temporary)
+        base = StarGraph.from_csv(directory)
+
+    if (list(graph.person_ids) != list(people)
+            or list(graph.movie_ids) != list(movies)):
+        raise Exception("blank lines changed the people or movies loaded")
+    for i, person_id in enumerate(graph.person_ids):
+        # The original loader adds the short row's missing movie as None
+        # before failing to find it
+        loaded = {graph.movie_ids[m] for m in graph.movies_of(i)}
+        if loaded != people[person_id]["movies"] - {None}:
+            raise Exception(f"blank lines changed the movies of {person_id}")
+    if graph.dropped_stars != base.dropped_stars + 3:
+        raise Exception(f"expected {base.dropped_stars + 3} dropped rows of "
+                        f"stars.csv, got {graph.dropped_stars}")
+
+
+def compare_loaders(directory):
+    """
+    Compares the original loader with the chunked CSR ingest.
+    """
+    measure_load("before", lambda: legacy_load_data(directory))
+    graph = measure_load("after", lambda: StarGraph.from_csv(directory))
+    print(f"Dropped {graph.dropped_stars} rows of stars.csv that were "
+          "blank, short or naming an unknown person or movie.")
+    check_blank_lines(directory)
+    print("Blank lines and short rows load as the original loader does.")
+
+
+def random_pairs(count, seed):
+    """
+    Returns `count` random (source, target) pairs of person ids.
+    """
+    rng = random.Random(seed)
+    person_ids = sorted(degrees.people)
+    return [(rng.choice(person_ids), rng.choice(person_ids))
+            for _ in range(count)]
+
+
+def run_queries(search, pairs):
+    """
+    Runs `search` over every pair, returning the elapsed time in seconds
+    and the paths found.
+    """
+    paths = []
+    start = time.perf_counter()
+    for source, target in pairs:
+        paths.append(search(source, target))
+    return time.perf_counter() - start, paths
+
+
+def check_parity(pairs, expected, actual):
+    """
+    Checks that every path in `actual` is a valid connection of the same
+    length as the corresponding path in `expected`.
+    """
+    for (source, target), want, got in zip(pairs, expected, actual):
+        if want is None or got is None:
+            if want is not got:
+                raise Exception(f"connectivity differs for {source} -> {target}")
+            continue
+        if len(want) != len(got):
+            raise Exception(f"path length differs for {source} -> {target}")
+        if source == target:
+            continue
+        person_id = source
+        for movie_id, next_id in got:
+            if (movie_id, next_id) not in degrees.neighbors_for_person(person_id):
+                raise Exception(f"invalid step in path for {source} -> {target}")
+            person_id = next_id
+        if person_id != target:
+            raise Exception(f"path does not reach {target}")
+
+
+def report(label, elapsed, count):
+    print(f"{label:>8}: {count} queries in {elapsed:.3f}s "
+          f"({count / elapsed:.1f} queries/sec)")
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Benchmark shortest_path between random pairs of people."
+    )
+    parser.add_argument("directory", nargs="?", default="large")
+    parser.add_argument("-n", "--queries", type=int, default=50)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--skip-baseline", action="store_true",
+                        help="don't time the original list-backed frontier")
+    parser.add_argument("--load", action="store_true",
+                        help="compare loaders instead of searches")
+    parser.add_argument("--stats", action="store_true",
+                        help="print each search's total statistics as JSON")
+    args = parser.parse_args()
+
+    if args.load:
+        compare_loaders(args.directory)
+        return
+
+    print("Loading data...")
+    degrees.load_data(args.directory)
+    print("Data loaded.")
+    pairs = random_pairs(args.queries, args.seed)
+
+    # Before: list-backed frontier with linear scans and slicing
+    if not args.skip_baseline:
+        before, before_paths = run_queries(
+            lambda source, target: frontier_shortest_path(
+                source, target, ListQueueFrontier
+            ),
+            pairs
+        )
+        report("before", before, len(pairs))
+
+    # After: deque-backed frontier with a companion set of states
+    after, after_paths = run_queries(
+        lambda source, target: frontier_shortest_path(
+            source, target, QueueFrontier
+        ),
+        pairs
+    )
+    report("after", after, len(pairs))
+
+    # Breadth-first search directly on the CSR arrays
+    csr, csr_paths = run_queries(degrees.shortest_path, pairs)
+    report("csr", csr, len(pairs))
+
+    # Bidirectional search, which must agree with plain BFS on every pair
+    bidirectional, bidirectional_paths = run_queries(
+        degrees.bidirectional_shortest_path, pairs
+    )
+    report("bidir", bidirectional, len(pairs))
+
+    # One source to many targets, answered from a single search tree
+    fanout = [(pairs[0][0], target) for _, target in pairs]
+    single, single_paths = run_queries(
+        degrees.bidirectional_shortest_path, fanout
+    )
+    report("1:n each", single, len(fanout))
+    degrees.trees.clear()
+    start = time.perf_counter()
+    degrees.distances_from(fanout[0][0])
+    _, tree_paths = run_queries(degrees.shortest_path, fanout)
+    tree = time.perf_counter() - start
+    report("1:n tree", tree, len(fanout))
+    degrees.trees.clear()
+
+    # Landmark bounds, which must contain every true distance, and A*
+    # search guided by them, which must agree with plain BFS
+    if degrees.landmark_index is not None:
+        astar, astar_paths = run_queries(degrees.astar_shortest_path, pairs)
+        report("astar", astar, len(pairs))
+        check_parity(pairs, csr_paths, astar_paths)
+
+        start = time.perf_counter()
+        bounds = [degrees.degree_bounds(source, target)
+                  for source, target in pairs]
+        report("bounds", time.perf_counter() - start, len(pairs))
+        for (source, target), (lower, upper), path in zip(
+            pairs, bounds, after_paths
+        ):
+            if source == target:
+                continue
+            distance = math.inf if path is None else len(path)
+            if not lower <= distance <= upper:
+                raise Exception("landmark bounds exclude the true distance")
+
+    # Totals over every pair, one JSON object per search, for comparing runs
+    if args.stats:
+        for name, search in (
+            ("csr", degrees.shortest_path),
+            ("bidir", degrees.bidirectional_shortest_path),
+            ("astar", degrees.astar_shortest_path),
+        ):
+            if name == "astar" and degrees.landmark_index is None:
+                continue
+            stats = SearchStats()
+            for source, target in pairs:
+                search(source, target, stats)
+            print(json.dumps({"search": name, **stats.as_dict()}))
+
+    if not args.skip_baseline:
+        check_parity(pairs, before_paths, after_paths)
+        print(f"Frontier speedup: {before / after:.2f}x")
+    check_parity(pairs, after_paths, csr_paths)
+    check_parity(pairs, after_paths, bidirectional_paths)
+    print(f"CSR speedup: {after / csr:.2f}x")
+    check_parity(fanout, single_paths, tree_paths)
+    print(f"Bidirectional speedup: {after / bidirectional:.2f}x")
+    print(f"Search tree speedup for one source: {single / tree:.2f}x")
+
+if __name__ == "__main__":
+    main()
@@ -1,9 +1,19 @@
+import argparse
 import csv
+import json
+import os
 import sys
+import time
+from collections import Counter, OrderedDict
 
-from util import Node, StackFrontier, QueueFrontier
+import snapshot
+from graph import StarGraph, PeopleView, MoviesView
+from landmarks import LandmarkIndex
+from nameindex import NameIndex
+from util import SearchStats
 
-# Maps names to a set of corresponding person_ids
+# Maps lowercased names to a set of corresponding person_ids,
+# with prefix and fuzzy search over them
 names = {}
 
 # Maps person_ids to a dictionary of: name, birth, movies (a set of movie_ids)
@@ -12,55 +22,85 @@ people = {}
 # Maps movie_ids to a dictionary of: title, year, stars (a set of person_ids)
 movies = {}
 
+# Integer-indexed star graph that people and movies are views onto
+graph = None
+
+# Landmark distance index, if one has been built for the dataset
+landmark_index = None
+
+# Most recently used search trees from distances_from, keyed by person_id
+trees = OrderedDict()
+MAX_TREES = 8
+
 
 def load_data(directory):
     """
-    Load data from CSV files into memory.
-    """
-    # Load people
-    with open(f"{directory}/people.csv", encoding="utf-8") as f:
-        reader = csv.DictReader(f)
-        for row in reader:
-            people[row["id"]] = {
-                "name": row["name"],
-                "birth": row["birth"],
-                "movies": set()
-            }
-            if row["name"].lower() not in names:
-                names[row["name"].lower()] = {row["id"]}
-            else:
-                names[row["name"].lower()].add(row["id"])
-
-    # Load movies
-    with open(f"{directory}/movies.csv", encoding="utf-8") as f:
-        reader = csv.DictReader(f)
-        for row in reader:
-            movies[row["id"]] = {
-                "title": row["title"],
-                "year": row["year"],
-                "stars": set()
-            }
-
-    # Load stars
-    with open(f"{directory}/stars.csv", encoding="utf-8") as f:
-        reader = csv.DictReader(f)
-        for row in reader:
-            try:
-                people[row["person_id"]]["movies"].add(row["movie_id"])
-                movies[row["movie_id"]]["stars"].add(row["person_id"])
-            except KeyError:
-                pass
+    Load data from CSV files into memory, or memory-map it from
+    the directory's compiled snapshot if there is an up to date one.
+    """
+    global graph, names, people, movies, landmark_index
+    graph = snapshot.load_snapshot(directory)
+    if graph is None:
+        graph = StarGraph.from_csv(directory)
+
+        # Refresh a snapshot that went stale when the CSV files changed
+        if os.path.exists(snapshot.snapshot_path(directory)):
+            snapshot.write_snapshot(directory, graph)
+
+    names = NameIndex(graph, getattr(graph, "name_order", None))
+
+    people = PeopleView(graph)
+    movies = MoviesView(graph)
+    landmark_index = LandmarkIndex.load(directory)
+
+    # An index built for a different number of people would be misread
+    if (landmark_index is not None and landmark_index.distances
+            and len(landmark_index.distances[0]) != len(graph.person_ids)):
+        landmark_index = None
+    trees.clear()
 
 
 def main():
-    if len(sys.argv) > 2:
-        sys.exit("Usage: python degrees.py [directory]")
-    directory = sys.argv[1] if len(sys.argv) == 2 else "large"
+    parser = argparse.ArgumentParser(
+        description="Find the degrees of separation between two people."
+    )
+    parser.add_argument("directory", nargs="?", default="large")
+    search = parser.add_mutually_exclusive_group()
+    search.add_argument("--bidirectional", action="store_true",
+                        help="search outward from both people at once")
+    search.add_argument("--astar", action="store_true",
+                        help="guide the search with the landmark index")
+    parser.add_argument("--stats", action="store_true",
+                        help="print statistics about the search as JSON")
+    parser.add_argument("--lookup", metavar="NAME",
+                        help="list the people a name might refer to")
+    parser.add_argument("--batch", metavar="PAIRS",
+                        help="answer every source,target pair in a CSV file")
+    parser.add_argument("--output", metavar="FILE",
+                        help="where to write batch results (.csv or .jsonl)")
+    args = parser.parse_args()
+    if args.batch and not args.output:
+        parser.error("--batch requires --output")
 
     # Load data from files into memory
     print("Loading data...")
-    load_data(directory)
+    load_data(args.directory)
     print("Data loaded.")
+    if graph.dropped_stars:
+        print(f"Skipped {graph.dropped_stars} rows of stars.csv that were "
+              "blank, short or naming an unknown person or movie.")
+
+    if args.lookup:
+        for person_id in person_ids_for_name(args.lookup):
+            person = people[person_id]
+            print(f"ID: {person_id}, Name: {person['name']}, "
+                  f"Birth: {person['birth']}")
+        return
+
+    if args.batch:
+        count = batch(args.batch, args.output)
+        print(f"Wrote {count} paths to {args.output}.")
+        return
 
     source = person_id_for_name(input("Name: "))
     if source is None:
@@ -69,7 +109,13 @@ def main():
     if target is None:
         sys.exit("Person not found.")
 
-    path = shortest_path(source, target)
+    stats = SearchStats() if args.stats else None
+    if args.bidirectional:
+        path = bidirectional_shortest_path(source, target, stats)
+    elif args.astar:
+        path = astar_shortest_path(source, target, stats)
+    else:
+        path = shortest_path(source, target, stats)
 
     if path is None:
         print("Not connected.")
@@ -83,45 +129,130 @@ def main():
             movie = movies[path[i + 1][0]]["title"]
             print(f"{i + 1}: {person1} and {person2} starred in {movie}")
 
+    if stats is not None:
+        print(stats.to_json())
+
+
+def shortest_path(source, target, stats=None):
+    """
+    Returns the shortest list of (movie_id, person_id) pairs
+    that connect the source to the target.
+
+    If no possible path, returns None. If given, stats is a
+    util.SearchStats that records the search's work.
+    """
+    if source == target:
+        return [(None, source)]
+    if source in trees:
+        started = time.perf_counter()
+        trees.move_to_end(source)
+        path = trees[source].path_to(graph.person_index[target])
+        if stats is not None:
+            stats.wall_time += time.perf_counter() - started
+        return path_ids(path)
+    return search(graph.shortest_path, source, target, stats)
+
+
+def astar_shortest_path(source, target, stats=None):
+    """
+    Returns the shortest list of (movie_id, person_id) pairs
+    that connect the source to the target, using the landmark
+    index's lower bounds as an A* heuristic to prune the search.
+
+    If no landmark index has been built, falls back to shortest_path.
+    If no possible path, returns None.
+    """
+    if source == target or landmark_index is None:
+        return shortest_path(source, target, stats)
+    heuristic = landmark_index.heuristic(graph.person_index[target])
+    return search(graph.astar_shortest_path, source, target, stats, heuristic)
+
+
+def bidirectional_shortest_path(source, target, stats=None):
+    """
+    Returns the shortest list of (movie_id, person_id) pairs
+    that connect the source to the target, growing one frontier
+    out from the source and another from the target until they meet.
+
+    If no possible path, returns None.
+    """
+    if source == target:
+        return [(None, source)]
+    return search(graph.bidirectional_shortest_path, source, target, stats)
+
+
+def search(method, source, target, stats, *args):
+    """
+    Runs one of the graph's search methods between two person_ids,
+    adding its wall time to stats if given, and returns the path
+    it finds as (movie_id, person_id) pairs.
+    """
+    started = time.perf_counter()
+    path = method(graph.person_index[source], graph.person_index[target],
+                  *args, stats=stats)
+    if stats is not None:
+        stats.wall_time += time.perf_counter() - started
+    return path_ids(path)
+
+
+def distances_from(source):
+    """
+    Runs one full search out from the source and returns its PathTree.
+
+    The tree is kept, so later shortest_path(source, target) calls
+    for any target are answered by walking it instead of searching.
+    """
+    tree = trees.get(source)
+    if tree is None:
+        tree = graph.distances_from(graph.person_index[source])
+        trees[source] = tree
+        if len(trees) > MAX_TREES:
+            trees.popitem(last=False)
+    else:
+        trees.move_to_end(source)
+    return tree
+
+
+def degree_bounds(source, target):
+    """
+    Returns (lower, upper) bounds on the degrees of separation between
+    two people from the landmark index, with math.inf meaning unbounded,
+    or None if no index has been built for the dataset.
+    """
+    if landmark_index is None:
+        return None
+    return landmark_index.bounds(
+        graph.person_index[source], graph.person_index[target]
+    )
+
+
+def within_degrees(source, target, degrees):
+    """
+    Returns True if two people are connected by at most `degrees`
+    movies, searching only when the landmark bounds can't decide it.
+    """
+    bounds = degree_bounds(source, target)
+    if bounds is not None:
+        lower, upper = bounds
+        if upper <= degrees:
+            return True
+        if lower > degrees:
+            return False
+    path = bidirectional_shortest_path(source, target)
+    return path is not None and len(path) <= degrees
+
+
+def path_ids(path):
+    """
+    Converts a path of (movie, person) graph indices into
+    (movie_id, person_id) pairs.
+    """
+    if path is None:
+        return None
+    return [(graph.movie_ids[movie], graph.person_ids[person])
+            for movie, person in path]
+
 
-def shortest_path(source, target):
-    num_explored = set() 
-    
-    #Inialize frontier to just the strating position
-    start = Node(state=source, parent=None, action=None)
-    frontier = QueueFrontier()
-    frontier.add(start)
-    
-    if start.state == target:
-        solution = [(None,start.state)]
-        return solution
-
-    #Keep looping until solution found
-    while True:
-
-        #If nothing left in the frontier, then no path 
-        if frontier.empty():
-            raise Exception("No solution")
-
-        #Choose a node from frintier 
-        node = frontier.remove()
-        num_explored.add(node.state)
-
-        
-        #Add neighbors to frontier
-        for movie_id, person_id in neighbors_for_person(node.state):
-            if not frontier.contains_state(person_id) and person_id not in num_explored:
-                child = Node(state=person_id, parent=node, action= movie_id)
-                #if the node is the goal, then we have a solution 
-                if child.state == target:
-                    solution=[]
-                    while child.parent is not None:
-                        solution.append((child.action,child.state))
-                        child = child.parent
-                    solution.reverse()
-                    return solution
-                frontier.add(child)
-        
 def person_id_for_name(name):
     """
     Returns the IMDB id for a person's name,
@@ -148,17 +279,118 @@ def person_id_for_name(name):
         return person_ids[0]
 
 
+def person_ids_for_name(name, limit=10):
+    """
+    Returns up to `limit` IMDB ids for people a name might refer to,
+    without asking: exact matches, then prefix matches, then names
+    within a couple of typos of it, best connected first within each.
+    """
+    return names.candidates(name, limit)
+
+
+def unique_person_id(name):
+    """
+    Returns the IMDB id for a person's name, or None if
+    the name is unknown or ambiguous.
+    """
+    person_ids = names.get(name.lower(), set())
+    if len(person_ids) != 1:
+        return None
+    return next(iter(person_ids))
+
+
+def batch(pairs_file, output_file):
+    """
+    Finds the shortest path for every pair of names in a CSV file
+    with source and target columns, and writes the results to
+    output_file as CSV if it ends in .csv, or JSON lines otherwise.
+
+    Returns the number of pairs answered.
+    """
+    with open(pairs_file, encoding="utf-8") as f:
+        pairs = [(row["source"], row["target"]) for row in csv.DictReader(f)]
+    queries = [(unique_person_id(source), unique_person_id(target))
+               for source, target in pairs]
+
+    # People asked about more than once get a search tree, and queries
+    # are answered grouped by source so each tree is only built once
+    repeated = {
+        source for source, count in Counter(
+            source for source, _ in queries if source is not None
+        ).items() if count > 1
+    }
+    paths = [None] * len(queries)
+    for i in sorted(range(len(queries)), key=lambda i: queries[i][0] or ""):
+        source, target = queries[i]
+        if source is None or target is None:
+            continue
+        if source == target:
+            paths[i] = []
+        elif source in repeated:
+            distances_from(source)
+            paths[i] = shortest_path(source, target)
+        else:
+            paths[i] = bidirectional_shortest_path(source, target)
+
+    with open(output_file, "w", encoding="utf-8", newline="") as f:
+        if output_file.endswith(".csv"):
+            writer = csv.writer(f)
+            writer.writerow(["source", "target", "degrees", "path", "error"])
+        for (source_name, target_name), (source, target), path in zip(
+            pairs, queries, paths
+        ):
+            if source is None or target is None:
+                name = source_name if source is None else target_name
+                error = f"'{name}' is unknown or ambiguous"
+            elif path is None:
+                error = "not connected"
+            else:
+                error = None
+
+            if output_file.endswith(".csv"):
+                writer.writerow([
+                    source_name, target_name,
+                    "" if path is None else len(path),
+                    "" if path is None else ";".join(
+                        f"{movie_id}:{person_id}" for movie_id, person_id in path
+                    ),
+                    error or ""
+                ])
+            else:
+                record = path_record(source_name, target_name, path, error)
+                f.write(json.dumps(record) + "\n")
+    return len(pairs)
+
+
+def path_record(source_name, target_name, path, error=None):
+    """
+    Returns a JSON-serializable dictionary describing the path
+    found between two people.
+    """
+    return {
+        "source": source_name,
+        "target": target_name,
+        "degrees": None if path is None else len(path),
+        "path": None if path is None else [
+            {"movie_id": movie_id,
+             "title": movies[movie_id]["title"],
+             "person_id": person_id,
+             "name": people[person_id]["name"]}
+            for movie_id, person_id in path
+        ],
+        "error": error
+    }
+
+
 def neighbors_for_person(person_id):
     """
     Returns (movie_id, person_id) pairs for people
     who starred with a given person.
     """
-    movie_ids = people[person_id]["movies"]
-    neighbors = set()
-    for movie_id in movie_ids:
-        for person_id in movies[movie_id]["stars"]:
-            neighbors.add((movie_id, person_id))
-    return neighbors
+    return {
+        (graph.movie_ids[movie], graph.person_ids[person])
+        for movie, person in graph.neighbors(graph.person_index[person_id])
+    }
 
 
 if __name__ == "__main__":
@@ -0,0 +1,512 @@
+import csv
+import heapq
+import math
+import time
+from array import array
+from collections import deque
+from collections.abc import Mapping
+from itertools import islice
+from operator import itemgetter
+
+# Rows of stars.csv mapped to graph indices at a time
+CHUNK_SIZE = 65536
+
+
+def read_columns(filename, columns):
+    """
+    Reads the named columns of a CSV file into one list per column.
+    """
+    with open(filename, encoding="utf-8", newline="") as f:
+        reader = csv.reader(f)
+        header = next(reader)
+        positions = [header.index(column) for column in columns]
+        lists = [[] for _ in columns]
+        appends = [(position, values.append)
+                   for position, values in zip(positions, lists)]
+        for row in reader:
+            # csv.reader gives blank lines as empty rows
+            if not row:
+                continue
+            for position, append in appends:
+                append(row[position])
+    return lists
+
+
+def read_stars(filename, person_index, movie_index, chunk_size=CHUNK_SIZE):
+    """
+    Reads stars.csv `chunk_size` rows at a time, mapping its person_id and
+    movie_id columns to graph indices a whole chunk at once.
+
+    Returns (people, movies, dropped): arrays holding the person and
+    movie of each star, and the number of rows skipped for being blank,
+    too short to hold both ids, or naming an unknown person or movie.
+    """
+    people = array("i")
+    movies = array("i")
+    dropped = 0
+    with open(filename, encoding="utf-8", newline="") as f:
+        reader = csv.reader(f)
+        header = next(reader)
+        person_position = header.index("person_id")
+        movie_position = header.index("movie_id")
+        person_column = itemgetter(person_position)
+        movie_column = itemgetter(movie_position)
+        width = max(person_position, movie_position) + 1
+        while True:
+            rows = list(islice(reader, chunk_size))
+            if not rows:
+                break
+            complete = [row for row in rows if len(row) >= width]
+            dropped += len(rows) - len(complete)
+            rows = complete
+            chunk_people = list(map(person_index.get, map(person_column, rows)))
+            chunk_movies = list(map(movie_index.get, map(movie_column, rows)))
+            if None in chunk_people or None in chunk_movies:
+                stars = [
+                    (person, movie)
+                    for person, movie in zip(chunk_people, chunk_movies)
+                    if person is not None and movie is not None
+                ]
+                dropped += len(rows) - len(stars)
+                chunk_people = [person for person, _ in stars]
+                chunk_movies = [movie for _, movie in stars]
+            people.extend(chunk_people)
+            movies.extend(chunk_movies)
+    return people, movies, dropped
+
+
+def build_csr(size, sources, targets):
+    """
+    Groups the edges (sources[k], targets[k]) by source, returning
+    (offsets, indices) such that the targets of source i are
+    indices[offsets[i]:offsets[i + 1]].
+    """
+    offsets = array("q", bytes(8 * (size + 1)))
+    for source in sources:
+        offsets[source + 1] += 1
+    for i in range(size):
+        offsets[i + 1] += offsets[i]
+
+    indices = array("i", bytes(4 * len(targets)))
+    position = array("q", offsets[:-1])
+    for source, target in zip(sources, targets):
+        indices[position[source]] = target
+        position[source] += 1
+    return offsets, indices
+
+
+class StarGraph():
+    """
+    Bipartite graph of people and the movies they starred in.
+
+    People and movies are numbered with dense ints in file order, and each
+    side's adjacency is stored as a pair of CSR arrays: the movies of person
+    p are person_movies[person_offsets[p]:person_offsets[p + 1]], and the
+    stars of movie m are movie_people[movie_offsets[m]:movie_offsets[m + 1]].
+    """
+
+    def __init__(self, person_ids, person_names, person_births,
+                 movie_ids, movie_titles, movie_years,
+                 person_offsets, person_movies, movie_offsets, movie_people,
+                 person_index=None, movie_index=None):
+        self.person_ids = person_ids
+        self.person_names = person_names
+        self.person_births = person_births
+        self.movie_ids = movie_ids
+        self.movie_titles = movie_titles
+        self.movie_years = movie_years
+        self.person_offsets = person_offsets
+        self.person_movies = person_movies
+        self.movie_offsets = movie_offsets
+        self.movie_people = movie_people
+
+        # Maps IMDB ids to graph indices, built here unless given
+        if person_index is None:
+            person_index = {
+                person_id: i for i, person_id in enumerate(person_ids)
+            }
+        if movie_index is None:
+            movie_index = {
+                movie_id: i for i, movie_id in enumerate(movie_ids)
+            }
+        self.person_index = person_index
+        self.movie_index = movie_index
+
+        # Rows of stars.csv skipped while building the graph
+        self.dropped_stars = 0
+
+    @classmethod
+    def from_csv(cls, directory, chunk_size=CHUNK_SIZE):
+        """
+        Builds a graph from people.csv, movies.csv and stars.csv.
+
+        stars.csv is read in chunks of rows whose ids are mapped to graph
+        indices in bulk. Rows naming an unknown person or movie are
+        skipped, and counted in the graph's dropped_stars.
+        """
+        person_ids, person_names, person_births = read_columns(
+            f"{directory}/people.csv", ("id", "name", "birth")
+        )
+        movie_ids, movie_titles, movie_years = read_columns(
+            f"{directory}/movies.csv", ("id", "title", "year")
+        )
+        person_index = dict(zip(person_ids, range(len(person_ids))))
+        movie_index = dict(zip(movie_ids, range(len(movie_ids))))
+        star_people, star_movies, dropped = read_stars(
+            f"{directory}/stars.csv", person_index, movie_index, chunk_size
+        )
+
+        person_offsets, person_movies = build_csr(
+            len(person_ids), star_people, star_movies
+        )
+        movie_offsets, movie_people = build_csr(
+            len(movie_ids), star_movies, star_people
+        )
+        graph = cls(person_ids, person_names, person_births,
+                    movie_ids, movie_titles, movie_years,
+                    person_offsets, person_movies, movie_offsets, movie_people,
+                    person_index=person_index, movie_index=movie_index)
+        graph.dropped_stars = dropped
+        return graph
+
+    def movies_of(self, person):
+        """Returns the movies a person starred in."""
+        return self.person_movies[
+            self.person_offsets[person]:self.person_offsets[person + 1]
+        ]
+
+    def stars_of(self, movie):
+        """Returns the people who starred in a movie."""
+        return self.movie_people[
+            self.movie_offsets[movie]:self.movie_offsets[movie + 1]
+        ]
+
+    def neighbors(self, person):
+        """
+        Returns (movie, person) pairs for people who starred with a given
+        person, including the person themselves.
+        """
+        return {
+            (movie, other)
+            for movie in self.movies_of(person)
+            for other in self.stars_of(movie)
+        }
+
+    def casts(self, person, expanded, stats=None):
+        """
+        Returns (movie, stars) for each movie the person starred in that
+        is not yet in the set `expanded`, adding those movies to it.
+        """
+        if stats is not None:
+            stats.expanded += 1
+            started = time.perf_counter()
+        casts = []
+        for movie in self.movies_of(person):
+            if movie not in expanded:
+                expanded.add(movie)
+                casts.append((movie, self.stars_of(movie)))
+        if stats is not None:
+            stats.neighbor_time += time.perf_counter() - started
+        return casts
+
+    def shortest_path(self, source, target, stats=None):
+        """
+        Returns the shortest list of (movie, person) pairs that connect
+        the source to the target, or None if they are not connected.
+
+        If given, stats is a SearchStats that records the search's work.
+        """
+        if source == target:
+            return []
+
+        # Each movie's cast only needs scanning the first time it is reached
+        parents = {source: None}
+        expanded = set()
+        queue = deque([source])
+        while queue:
+            person = queue.popleft()
+            for movie, stars in self.casts(person, expanded, stats):
+                for other in stars:
+                    if other in parents:
+                        if stats is not None:
+                            stats.duplicates += 1
+                        continue
+                    parents[other] = (movie, person)
+                    if other == target:
+                        return self.trace(parents, target)
+                    queue.append(other)
+            if stats is not None:
+                stats.frontier_size(len(queue))
+        return None
+
+    def bidirectional_shortest_path(self, source, target, stats=None):
+        """
+        Returns the shortest list of (movie, person) pairs that connect
+        the source to the target, growing one frontier out from the source
+        and another from the target until they meet.
+
+        If they are not connected, returns None. If given, stats is a
+        SearchStats that records the search's work.
+        """
+        if source == target:
+            return []
+
+        # Each side maps a reached person to the (movie, person) step back
+        # towards that side's starting person, and to its distance from it
+        forward = {source: None}
+        backward = {target: None}
+        forward_depth = {source: 0}
+        backward_depth = {target: 0}
+        forward_expanded = set()
+        backward_expanded = set()
+        forward_level = [source]
+        backward_level = [target]
+
+        while forward_level and backward_level:
+            if stats is not None:
+                stats.frontier_size(len(forward_level) + len(backward_level))
+
+            # Expand the side with the smaller frontier by one whole level
+            if len(forward_level) <= len(backward_level):
+                parents, depth, expanded = forward, forward_depth, forward_expanded
+                level = forward_level
+                other_parents, other_depth = backward, backward_depth
+            else:
+                parents, depth, expanded = backward, backward_depth, backward_expanded
+                level = backward_level
+                other_parents, other_depth = forward, forward_depth
+
+            next_level = []
+            meeting = None
+            meeting_length = None
+            for person in level:
+                for movie, stars in self.casts(person, expanded, stats):
+                    for other in stars:
+                        if other in parents:
+                            if stats is not None:
+                                stats.duplicates += 1
+                            continue
+                        parents[other] = (movie, person)
+                        depth[other] = depth[person] + 1
+
+                        # Keep the shortest connection found on this level
+                        if other in other_parents:
+                            length = depth[other] + other_depth[other]
+                            if meeting is None or length < meeting_length:
+                                meeting, meeting_length = other, length
+                        next_level.append(other)
+
+            if meeting is not None:
+                return (self.trace(forward, meeting)
+                        + self.trace_back(backward, meeting))
+
+            if parents is forward:
+                forward_level = next_level
+            else:
+                backward_level = next_level
+
+        return None
+
+    def astar_shortest_path(self, source, target, heuristic, stats=None):
+        """
+        Returns the shortest list of (movie, person) pairs that connect
+        the source to the target, or None if they are not connected.
+
+        Searches in order of distance so far plus heuristic(person), which
+        must never overestimate the remaining distance to the target.
+        If given, stats is a SearchStats that records the search's work.
+        """
+        if source == target:
+            return []
+
+        if heuristic(source) == math.inf:
+            return None
+
+        parents = {source: None}
+        distance = {source: 0}
+
+        # A movie's cast only needs scanning again if it is reached
+        # by a shorter path than the last time it was scanned
+        expanded = {}
+        frontier = [(heuristic(source), 0, source)]
+        while frontier:
+            _, d, person = heapq.heappop(frontier)
+            if person == target:
+                return self.trace(parents, target)
+            if d > distance[person]:
+                if stats is not None:
+                    stats.duplicates += 1
+                continue
+
+            if stats is not None:
+                stats.expanded += 1
+                started = time.perf_counter()
+            casts = []
+            for movie in self.movies_of(person):
+                if expanded.get(movie, math.inf) > d:
+                    expanded[movie] = d
+                    casts.append((movie, self.stars_of(movie)))
+            if stats is not None:
+                stats.neighbor_time += time.perf_counter() - started
+
+            for movie, stars in casts:
+                for other in stars:
+                    if distance.get(other, math.inf) <= d + 1:
+                        if stats is not None:
+                            stats.duplicates += 1
+                        continue
+                    estimate = heuristic(other)
+                    if estimate == math.inf:
+                        continue
+                    distance[other] = d + 1
+                    parents[other] = (movie, person)
+                    heapq.heappush(frontier, (d + 1 + estimate, d + 1, other))
+            if stats is not None:
+                stats.frontier_size(len(frontier))
+        return None
+
+    def distances_from(self, source):
+        """
+        Runs one full breadth-first search from the source, returning the
+        PathTree of shortest paths from it to every person it reaches.
+        """
+        size = len(self.person_ids)
+        distance = array("i", [-1]) * size
+        parent_movie = array("i", [-1]) * size
+        parent_person = array("i", [-1]) * size
+        expanded = bytearray(len(self.movie_ids))
+
+        distance[source] = 0
+        level = [source]
+        depth = 0
+        while level:
+            depth += 1
+            next_level = []
+            for person in level:
+                for movie in self.movies_of(person):
+                    if expanded[movie]:
+                        continue
+                    expanded[movie] = 1
+                    for other in self.stars_of(movie):
+                        if distance[other] >= 0:
+                            continue
+                        distance[other] = depth
+                        parent_movie[other] = movie
+                        parent_person[other] = person
+                        next_level.append(other)
+            level = next_level
+        return PathTree(source, distance, parent_movie, parent_person)
+
+    @staticmethod
+    def trace(parents, person):
+        """
+        Returns the (movie, person) path from the root of `parents` to
+        `person`.
+        """
+        path = []
+        while parents[person] is not None:
+            movie, previous = parents[person]
+            path.append((movie, person))
+            person = previous
+        path.reverse()
+        return path
+
+    @staticmethod
+    def trace_back(parents, person):
+        """
+        Returns the (movie, person) path from `person` to the root of
+        `parents`.
+        """
+        path = []
+        while parents[person] is not None:
+            movie, following = parents[person]
+            path.append((movie, following))
+            person = following
+        return path
+
+
+class PathTree():
+    """
+    Shortest paths from one source person to everyone reachable from
+    them, stored as the breadth-first search tree: distance[p] is the
+    number of movies between the source and p (-1 if unreachable), and
+    p was reached through movie parent_movie[p] from parent_person[p].
+    """
+
+    def __init__(self, source, distance, parent_movie, parent_person):
+        self.source = source
+        self.distance = distance
+        self.parent_movie = parent_movie
+        self.parent_person = parent_person
+
+    def distance_to(self, target):
+        """Returns the degrees of separation to target, or None."""
+        distance = self.distance[target]
+        return None if distance < 0 else distance
+
+    def path_to(self, target):
+        """
+        Returns the shortest list of (movie, person) pairs that connect
+        the source to the target, or None if they are not connected.
+        """
+        if self.distance[target] < 0:
+            return None
+        path = []
+        person = target
+        while person != self.source:
+            path.append((self.parent_movie[person], person))
+            person = self.parent_person[person]
+        path.reverse()
+        return path
+
+
+class PeopleView(Mapping):
+    """
+    Read-only view of a StarGraph shaped like the original people dict,
+    mapping person_ids to a dictionary of: name, birth, movies.
+    """
+
+    def __init__(self, graph):
+        self.graph = graph
+
+    def __getitem__(self, person_id):
+        graph = self.graph
+        person = graph.person_index[person_id]
+        return {
+            "name": graph.person_names[person],
+            "birth": graph.person_births[person],
+            "movies": {graph.movie_ids[movie]
+                       for movie in graph.movies_of(person)}
+        }
+
+    def __iter__(self):
+        return iter(self.graph.person_ids)
+
+    def __len__(self):
+        return len(self.graph.person_ids)
+
+
+class MoviesView(Mapping):
+    """
+    Read-only view of a StarGraph shaped like the original movies dict,
+    mapping movie_ids to a dictionary of: title, year, stars.
+    """
+
+    def __init__(self, graph):
+        self.graph = graph
+
+    def __getitem__(self, movie_id):
+        graph = self.graph
+        movie = graph.movie_index[movie_id]
+        return {
+            "title": graph.movie_titles[movie],
+            "year": graph.movie_years[movie],
+            "stars": {graph.person_ids[person]
+                      for person in graph.stars_of(movie)}
+        }
+
+    def __iter__(self):
+        return iter(self.graph.movie_ids)
+
+    def __len__(self):
+        return len(self.graph.movie_ids)
@@ -0,0 +1,198 @@
+import argparse
+import math
+import mmap
+import os
+import struct
+from array import array
+
+import snapshot
+from graph import StarGraph
+
+LANDMARKS_NAME = "degrees.landmarks"
+MAGIC = b"LANDMARK"
+VERSION = 1
+
+# Magic, version, landmark count, people count, then the (size, mtime) of
+# each source CSV, followed by the landmarks and their distance rows
+HEADER = struct.Struct("=8sIii4x" + "q" * 2 * len(snapshot.SOURCES))
+
+
+class LandmarkIndex():
+    """
+    Breadth-first distances from K landmark people to every person.
+
+    By the triangle inequality, for any landmark L the distance between
+    s and t is at least |d(L, s) - d(L, t)| and at most d(L, s) + d(L, t),
+    which gives lower and upper bounds on it in O(K).
+    """
+
+    def __init__(self, landmarks, distances):
+        self.landmarks = landmarks
+        self.distances = distances
+
+    @classmethod
+    def build(cls, graph, count):
+        """
+        Picks `count` landmarks and runs a full search from each.
+
+        Landmarks alternate between the best connected person not yet
+        chosen, which keeps upper bounds tight, and the person farthest
+        from every landmark so far, which keeps lower bounds tight.
+        """
+        by_movies = sorted(
+            range(len(graph.person_ids)),
+            key=lambda person: -(graph.person_offsets[person + 1]
+                                 - graph.person_offsets[person])
+        )
+        landmarks = array("i")
+        distances = []
+        nearest = None
+        while len(landmarks) < min(count, len(graph.person_ids)):
+            if len(landmarks) % 2 == 0 or nearest is None:
+                landmark = next(
+                    person for person in by_movies if person not in landmarks
+                )
+            else:
+                landmark = max(
+                    (person for person in range(len(nearest))
+                     if person not in landmarks),
+                    key=nearest.__getitem__
+                )
+            distance = array("h", graph.distances_from(landmark).distance)
+            landmarks.append(landmark)
+            distances.append(distance)
+
+            # Track each person's distance to their nearest landmark
+            if nearest is None:
+                nearest = array("h", distance)
+            else:
+                for person, d in enumerate(distance):
+                    if 0 <= d < nearest[person] or nearest[person] < 0:
+                        nearest[person] = d
+        return cls(landmarks, distances)
+
+    def bounds(self, source, target):
+        """
+        Returns (lower, upper) bounds on the degrees of separation
+        between two people, with math.inf meaning unbounded. If the
+        index shows they are not connected, both bounds are math.inf.
+        """
+        if source == target:
+            return 0, 0
+        lower = 0
+        upper = math.inf
+        for distance in self.distances:
+            s, t = distance[source], distance[target]
+            if s < 0 and t < 0:
+                continue
+            if s < 0 or t < 0:
+                return math.inf, math.inf
+            lower = max(lower, abs(s - t))
+            upper = min(upper, s + t)
+        return lower, upper
+
+    def heuristic(self, target):
+        """
+        Returns a function giving a lower bound on the distance from any
+        person to target, for use as an A* heuristic.
+        """
+        rows = [(distance, distance[target]) for distance in self.distances]
+
+        def lower_bound(person):
+            bound = 0
+            for distance, t in rows:
+                s = distance[person]
+                if s < 0 and t < 0:
+                    continue
+                if s < 0 or t < 0:
+                    return math.inf
+                if abs(s - t) > bound:
+                    bound = abs(s - t)
+            return bound
+        return lower_bound
+
+    def write(self, directory):
+        """
+        Writes the index next to the CSV files in directory,
+        returning its path.
+        """
+        path = landmarks_path(directory)
+        temporary = path + ".tmp"
+        size = len(self.distances[0]) if self.distances else 0
+        with open(temporary, "wb") as f:
+            f.write(HEADER.pack(
+                MAGIC, VERSION, len(self.landmarks), size,
+                *snapshot.source_signature(directory)
+            ))
+            f.write(self.landmarks.tobytes())
+            f.write(bytes(-len(self.landmarks) * self.landmarks.itemsize % 8))
+            for distance in self.distances:
+                f.write(distance.tobytes())
+        os.replace(temporary, path)
+        return path
+
+    @classmethod
+    def load(cls, directory):
+        """
+        Memory-maps the index in directory.
+
+        Returns None if there is no index, if it was written by another
+        version or from CSV files that have since changed, or if it is too
+        short to hold the rows it lists.
+        """
+        try:
+            with open(landmarks_path(directory), "rb") as f:
+                if os.fstat(f.fileno()).st_size < HEADER.size:
+                    return None
+                buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except FileNotFoundError:
+            return None
+
+        magic, version, count, size, *signature = HEADER.unpack_from(buffer)
+        if (magic != MAGIC or version != VERSION
+                or signature != snapshot.source_signature(directory)):
+            buffer.close()
+            return None
+
+        # A truncated or damaged file can't hold every row it lists
+        if (count < 0 or size < 0 or HEADER.size + 4 * count + (-4 * count % 8)
+                + 2 * size * count > len(buffer)):
+            buffer.close()
+            return None
+
+        view = memoryview(buffer)
+        position = HEADER.size
+        landmarks = view[position:position + 4 * count].cast("i")
+        position += 4 * count + (-4 * count % 8)
+        distances = []
+        for _ in range(count):
+            distances.append(view[position:position + 2 * size].cast("h"))
+            position += 2 * size
+        return cls(landmarks, distances)
+
+
+def landmarks_path(directory):
+    return os.path.join(directory, LANDMARKS_NAME)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Build the landmark distance index for a dataset."
+    )
+    parser.add_argument("directory", nargs="?", default="large")
+    parser.add_argument("-k", "--landmarks", type=int, default=16)
+    args = parser.parse_args()
+
+    print("Loading data...")
+    graph = snapshot.load_snapshot(args.directory)
+    if graph is None:
+        graph = StarGraph.from_csv(args.directory)
+    print("Data loaded.")
+
+    print(f"Searching from {args.landmarks} landmarks...")
+    index = LandmarkIndex.build(graph, args.landmarks)
+    print(f"Wrote {index.write(args.directory)}.")
+
+
+if __name__ == "__main__":
+    main()
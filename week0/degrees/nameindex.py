@@ -0,0 +1,216 @@
+import heapq
+from array import array
+from bisect import bisect_left, bisect_right
+from collections.abc import Mapping
+
+# Sorts after every character, so prefix + LAST is past every key with prefix
+LAST = "\U0010ffff"
+
+# Prefixes matching more people than this are ranked by scanning everyone
+# in order of movies rather than by ranking every match
+POPULAR_SCAN = 2000
+
+
+class NameIndex(Mapping):
+    """
+    Maps lowercased names to a set of corresponding person_ids, and
+    supports prefix and fuzzy search, by binary search over the people
+    of a graph sorted by lowercased name.
+
+    The sorted order doubles as an implicit trie: the keys starting with
+    any prefix form one contiguous range of it.
+    """
+
+    def __init__(self, graph, order=None):
+        self.graph = graph
+        if order is None:
+            order = sorted(
+                range(len(graph.person_ids)),
+                key=lambda person: graph.person_names[person].lower()
+            )
+        self.order = order
+
+        # Distinct keys for prefix and fuzzy search, built on first use
+        self.keys = None
+        self.starts = None
+        self.popular = None
+
+    def key(self, person):
+        return self.graph.person_names[person].lower()
+
+    def find(self, name, lo=0, hi=None):
+        """
+        Returns the range of positions in order whose key is name.
+        """
+        if hi is None:
+            hi = len(self.order)
+        start = bisect_left(self.order, name, lo, hi, key=self.key)
+        end = bisect_right(self.order, name, start, hi, key=self.key)
+        return range(start, end)
+
+    def __getitem__(self, name):
+        positions = self.find(name)
+        if not positions:
+            raise KeyError(name)
+        return {self.graph.person_ids[self.order[i]] for i in positions}
+
+    def __iter__(self):
+        previous = None
+        for person in self.order:
+            name = self.key(person)
+            if name != previous:
+                yield name
+                previous = name
+
+    def __len__(self):
+        return sum(1 for _ in self)
+
+    def build(self):
+        """
+        Builds the sorted list of distinct keys, and where each one's
+        people start in order, that prefix and fuzzy search walk.
+
+        This decodes every name, so it is done on first use rather than
+        when a memory-mapped snapshot is loaded.
+        """
+        keys = []
+        starts = array("i")
+        for position, person in enumerate(self.order):
+            key = self.key(person)
+            if not keys or keys[-1] != key:
+                keys.append(key)
+                starts.append(position)
+        starts.append(len(self.order))
+        self.keys = keys
+        self.starts = starts
+
+        # People with the most movies first, for prefixes matching many keys
+        offsets = self.graph.person_offsets
+        self.popular = array("i", sorted(
+            range(len(self.order)),
+            key=lambda person: offsets[person] - offsets[person + 1]
+        ))
+
+    def people(self, first, last):
+        """
+        Yields (0, person) for the people whose key is one of
+        keys[first:last].
+        """
+        for i in range(self.starts[first], self.starts[last]):
+            yield 0, self.order[i]
+
+    def prefix(self, prefix, limit=10):
+        """
+        Returns up to `limit` person_ids whose name starts with prefix,
+        best connected first.
+        """
+        if self.keys is None:
+            self.build()
+        prefix = prefix.lower()
+        first = bisect_left(self.keys, prefix)
+        last = bisect_left(self.keys, prefix + LAST, first)
+        if self.starts[last] - self.starts[first] <= POPULAR_SCAN:
+            return self.ranked(self.people(first, last), limit)
+
+        # So many people match that the best connected ones are quicker to
+        # find by scanning everyone in order of movies
+        results = []
+        for person in self.popular:
+            if self.key(person).startswith(prefix):
+                results.append(self.graph.person_ids[person])
+                if len(results) == limit:
+                    break
+        return results
+
+    def fuzzy(self, name, max_distance=2, limit=10):
+        """
+        Returns up to `limit` person_ids whose name is within max_distance
+        edits of name, closest and then best connected first.
+        """
+        if self.keys is None:
+            self.build()
+        return self.ranked(self.within(name.lower(), max_distance), limit)
+
+    def within(self, name, max_distance):
+        """
+        Yields (distance, person) for every person whose key is within
+        max_distance edits of name.
+
+        Walks the implicit trie depth first, carrying one row of the
+        Levenshtein table per prefix and abandoning any prefix whose row
+        is already entirely over max_distance. Only the band of each row
+        within max_distance of the diagonal can stay under it, so cells
+        outside the band are left at max_distance + 1.
+        """
+        keys = self.keys
+        over = max_distance + 1
+        first_row = [min(k, over) for k in range(len(name) + 1)]
+        stack = [("", 0, len(keys), first_row)]
+        while stack:
+            prefix, lo, hi, row = stack.pop()
+            depth = len(prefix)
+            i = lo
+
+            # The prefix itself is a complete key, which sorts first
+            if i < hi and len(keys[i]) == depth:
+                if row[-1] <= max_distance:
+                    for _, person in self.people(i, i + 1):
+                        yield row[-1], person
+                i += 1
+
+            # Keys in [i, end) all continue the prefix with one character
+            while i < hi:
+                character = keys[i][depth]
+                child = prefix + character
+                end = bisect_left(keys, child + LAST, i, hi)
+                next_row = [over] * len(row)
+                next_row[0] = min(depth + 1, over)
+                for k in range(max(1, depth + 1 - max_distance),
+                               min(len(name), depth + 1 + max_distance) + 1):
+                    next_row[k] = min(
+                        next_row[k - 1] + 1,
+                        row[k] + 1,
+                        row[k - 1] + (name[k - 1] != character),
+                        over
+                    )
+                if min(next_row) <= max_distance:
+                    stack.append((child, i, end, next_row))
+                i = end
+
+    def ranked(self, matches, limit=None):
+        """
+        Returns the person_ids of up to `limit` (distance, person) matches,
+        by distance and then by number of movies, most first.
+        """
+        offsets = self.graph.person_offsets
+
+        def rank(match):
+            distance, person = match
+            return distance, offsets[person] - offsets[person + 1]
+
+        if limit is None:
+            best = sorted(matches, key=rank)
+        else:
+            best = heapq.nsmallest(limit, matches, key=rank)
+        return [self.graph.person_ids[person] for _, person in best]
+
+    def candidates(self, name, limit=10, max_distance=2):
+        """
+        Returns up to `limit` person_ids that `name` might refer to:
+        exact matches, then names it is a prefix of, then names
+        within max_distance edits of it.
+        """
+        results = []
+        for search in (
+            lambda: self.ranked(
+                (0, self.order[i]) for i in self.find(name.lower())
+            ),
+            lambda: self.prefix(name, limit),
+            lambda: self.fuzzy(name, max_distance, limit),
+        ):
+            for person_id in search():
+                if person_id not in results:
+                    results.append(person_id)
+            if len(results) >= limit:
+                break
+        return results[:limit]
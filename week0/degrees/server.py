@@ -0,0 +1,120 @@
+import argparse
+import json
+import multiprocessing
+import os
+import statistics
+import sys
+import time
+
+import degrees
+
+
+def answer(line):
+    """
+    Answers one query, a JSON object with source and target names,
+    returning (response line, seconds spent answering it).
+    """
+    start = time.perf_counter()
+    try:
+        query = json.loads(line)
+        source_name, target_name = query["source"], query["target"]
+        if not isinstance(source_name, str) or not isinstance(target_name, str):
+            raise TypeError("names must be strings")
+    except (ValueError, TypeError, KeyError):
+        response = {"error": "expected a JSON object with source and target"}
+    else:
+        response = find_path(source_name, target_name)
+    elapsed = time.perf_counter() - start
+    response["latency_ms"] = round(elapsed * 1000, 3)
+    return json.dumps(response), elapsed
+
+
+def find_path(source_name, target_name):
+    """
+    Returns the path record for the shortest path between two names.
+    """
+    source = degrees.unique_person_id(source_name)
+    target = degrees.unique_person_id(target_name)
+    if source is None or target is None:
+        name = source_name if source is None else target_name
+        response = degrees.path_record(
+            source_name, target_name, None,
+            f"'{name}' is unknown or ambiguous"
+        )
+    elif source == target:
+        response = degrees.path_record(source_name, target_name, [])
+    else:
+        path = degrees.bidirectional_shortest_path(source, target)
+        response = degrees.path_record(
+            source_name, target_name, path,
+            "not connected" if path is None else None
+        )
+    return response
+
+
+def percentiles(latencies):
+    """
+    Returns the p50, p90, p99 and max of a list of latencies in seconds,
+    as a dictionary of milliseconds.
+    """
+    if len(latencies) < 2:
+        points = latencies * 99 or [0.0] * 99
+    else:
+        points = statistics.quantiles(latencies, n=100, method="inclusive")
+    return {
+        "p50": round(points[49] * 1000, 3),
+        "p90": round(points[89] * 1000, 3),
+        "p99": round(points[98] * 1000, 3),
+        "max": round(max(latencies, default=0.0) * 1000, 3),
+    }
+
+
+def serve(lines, output, workers):
+    """
+    Answers every query in `lines` using a pool of worker processes,
+    writing one JSON response per line to `output` in query order.
+
+    Workers are forked after the graph is loaded, so they share its
+    arrays (or the memory-mapped snapshot) with this process rather
+    than loading their own copy.
+
+    Returns the latency of every query in seconds.
+    """
+    latencies = []
+    context = multiprocessing.get_context("fork")
+    with context.Pool(workers) as pool:
+        # Hand queries out one at a time, so that each is answered as soon
+        # as it arrives rather than once a batch of them has
+        for response, elapsed in pool.imap(answer, lines, chunksize=1):
+            output.write(response + "\n")
+            output.flush()
+            latencies.append(elapsed)
+    return latencies
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Answer JSON lines of shortest path queries on stdin."
+    )
+    parser.add_argument("directory", nargs="?", default="large")
+    parser.add_argument("-j", "--workers", type=int, default=os.cpu_count(),
+                        help="number of worker processes")
+    args = parser.parse_args()
+
+    print("Loading data...", file=sys.stderr)
+    degrees.load_data(args.directory)
+    print("Data loaded.", file=sys.stderr)
+
+    start = time.perf_counter()
+    lines = (line for line in sys.stdin if line.strip())
+    latencies = serve(lines, sys.stdout, args.workers)
+    elapsed = time.perf_counter() - start
+
+    summary = percentiles(latencies)
+    summary["queries"] = len(latencies)
+    summary["queries_per_sec"] = round(len(latencies) / elapsed, 1)
+    print(json.dumps(summary), file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,247 @@
+import mmap
+import os
+import struct
+import sys
+from array import array
+from bisect import bisect_left
+from collections.abc import Mapping, Sequence
+
+from graph import StarGraph
+
+SNAPSHOT_NAME = "degrees.snapshot"
+MAGIC = b"DEGREES\0"
+VERSION = 2
+
+# CSV files whose size and mtime a snapshot records, to detect stale snapshots
+SOURCES = ("people.csv", "movies.csv", "stars.csv")
+
+# Sections in file order, with the array typecode each is stored as
+SECTIONS = (
+    ("person_offsets", "q"),
+    ("person_movies", "i"),
+    ("movie_offsets", "q"),
+    ("movie_people", "i"),
+    ("person_id_offsets", "q"),
+    ("person_id_data", "B"),
+    ("person_name_offsets", "q"),
+    ("person_name_data", "B"),
+    ("person_birth_offsets", "q"),
+    ("person_birth_data", "B"),
+    ("movie_id_offsets", "q"),
+    ("movie_id_data", "B"),
+    ("movie_title_offsets", "q"),
+    ("movie_title_data", "B"),
+    ("movie_year_offsets", "q"),
+    ("movie_year_data", "B"),
+    ("person_id_order", "i"),
+    ("movie_id_order", "i"),
+    ("name_order", "i"),
+)
+
+# Magic, version, the (size, mtime) of each source, the number of rows of
+# stars.csv dropped while loading, then (offset, length) in bytes of each
+# section
+HEADER = struct.Struct(
+    "=8sI4x" + "q" * (2 * len(SOURCES) + 1 + 2 * len(SECTIONS))
+)
+
+
+class StringTable(Sequence):
+    """
+    Sequence of strings stored as one UTF-8 buffer, where string i is
+    data[offsets[i]:offsets[i + 1]].
+    """
+
+    def __init__(self, offsets, data):
+        self.offsets = offsets
+        self.data = data
+
+    @classmethod
+    def pack(cls, strings):
+        """Returns (offsets, data) arrays holding `strings`."""
+        offsets = array("q", [0])
+        data = bytearray()
+        for string in strings:
+            data += string.encode("utf-8")
+            offsets.append(len(data))
+        return offsets, array("B", data)
+
+    def __getitem__(self, i):
+        if i < 0:
+            i += len(self)
+        return str(self.data[self.offsets[i]:self.offsets[i + 1]], "utf-8")
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+
+class SortedIndex(Mapping):
+    """
+    Maps each string in a table to its position, by binary search over
+    `order`, the positions of the table sorted by string.
+    """
+
+    def __init__(self, table, order):
+        self.table = table
+        self.order = order
+
+    def __getitem__(self, key):
+        i = bisect_left(self.order, key, key=self.table.__getitem__)
+        if i == len(self.order) or self.table[self.order[i]] != key:
+            raise KeyError(key)
+        return self.order[i]
+
+    def __iter__(self):
+        return (self.table[i] for i in self.order)
+
+    def __len__(self):
+        return len(self.order)
+
+
+def snapshot_path(directory):
+    return os.path.join(directory, SNAPSHOT_NAME)
+
+
+def source_signature(directory):
+    """
+    Returns the size and mtime of each source CSV in `directory`.
+    """
+    signature = []
+    for name in SOURCES:
+        stat = os.stat(os.path.join(directory, name))
+        signature.extend((stat.st_size, stat.st_mtime_ns))
+    return signature
+
+
+def write_snapshot(directory, graph=None):
+    """
+    Compiles the CSVs in `directory` (or an already loaded `graph` of them)
+    into a snapshot file next to them, returning its path.
+    """
+    signature = source_signature(directory)
+    if graph is None:
+        graph = StarGraph.from_csv(directory)
+
+    people = range(len(graph.person_ids))
+    movies = range(len(graph.movie_ids))
+    sections = {
+        "person_offsets": graph.person_offsets,
+        "person_movies": graph.person_movies,
+        "movie_offsets": graph.movie_offsets,
+        "movie_people": graph.movie_people,
+        "person_id_order": array(
+            "i", sorted(people, key=graph.person_ids.__getitem__)
+        ),
+        "movie_id_order": array(
+            "i", sorted(movies, key=graph.movie_ids.__getitem__)
+        ),
+        "name_order": array(
+            "i", sorted(people, key=lambda i: graph.person_names[i].lower())
+        ),
+    }
+    for prefix, strings in (
+        ("person_id", graph.person_ids),
+        ("person_name", graph.person_names),
+        ("person_birth", graph.person_births),
+        ("movie_id", graph.movie_ids),
+        ("movie_title", graph.movie_titles),
+        ("movie_year", graph.movie_years),
+    ):
+        offsets, data = StringTable.pack(strings)
+        sections[f"{prefix}_offsets"] = offsets
+        sections[f"{prefix}_data"] = data
+
+    # Lay sections out after the header, each aligned to 8 bytes
+    layout = []
+    position = HEADER.size
+    for name, typecode in SECTIONS:
+        length = len(sections[name]) * array(typecode).itemsize
+        layout.extend((position, length))
+        position += length + (-length % 8)
+
+    path = snapshot_path(directory)
+    temporary = path + ".tmp"
+    with open(temporary, "wb") as f:
+        f.write(HEADER.pack(MAGIC, VERSION, *signature, graph.dropped_stars,
+                            *layout))
+        for name, typecode in SECTIONS:
+            data = array(typecode, sections[name]).tobytes()
+            f.write(data)
+            f.write(bytes(-len(data) % 8))
+    os.replace(temporary, path)
+    return path
+
+
+def load_snapshot(directory):
+    """
+    Memory-maps the snapshot in `directory` as a StarGraph.
+
+    Returns None if there is no snapshot, if it was written by another
+    version or from CSV files that have since changed, or if its sections
+    don't fit in the file.
+    """
+    try:
+        with open(snapshot_path(directory), "rb") as f:
+            if os.fstat(f.fileno()).st_size < HEADER.size:
+                return None
+            buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    except FileNotFoundError:
+        return None
+
+    header = HEADER.unpack_from(buffer)
+    magic, version = header[:2]
+    signature = list(header[2:2 + 2 * len(SOURCES)])
+    dropped_stars = header[2 + 2 * len(SOURCES)]
+    layout = header[3 + 2 * len(SOURCES):]
+    if (magic != MAGIC or version != VERSION
+            or signature != source_signature(directory)):
+        buffer.close()
+        return None
+
+    # A truncated or damaged file can't hold every section it lists
+    for k, (name, typecode) in enumerate(SECTIONS):
+        offset, length = layout[2 * k], layout[2 * k + 1]
+        if (offset < HEADER.size or length < 0
+                or offset + length > len(buffer)
+                or length % array(typecode).itemsize):
+            buffer.close()
+            return None
+
+    view = memoryview(buffer)
+    sections = {}
+    for k, (name, typecode) in enumerate(SECTIONS):
+        offset, length = layout[2 * k], layout[2 * k + 1]
+        sections[name] = view[offset:offset + length].cast(typecode)
+
+    def strings(prefix):
+        return StringTable(
+            sections[f"{prefix}_offsets"], sections[f"{prefix}_data"]
+        )
+
+    person_ids = strings("person_id")
+    movie_ids = strings("movie_id")
+    graph = StarGraph(
+        person_ids, strings("person_name"), strings("person_birth"),
+        movie_ids, strings("movie_title"), strings("movie_year"),
+        sections["person_offsets"], sections["person_movies"],
+        sections["movie_offsets"], sections["movie_people"],
+        person_index=SortedIndex(person_ids, sections["person_id_order"]),
+        movie_index=SortedIndex(movie_ids, sections["movie_id_order"])
+    )
+    graph.name_order = sections["name_order"]
+    graph.dropped_stars = dropped_stars
+    return graph
+
+
+def main():
+    if len(sys.argv) > 2:
+        sys.exit("Usage: python snapshot.py [directory]")
+    directory = sys.argv[1] if len(sys.argv) == 2 else "large"
+
+    print("Compiling snapshot...")
+    path = write_snapshot(directory)
+    print(f"Wrote {path}.")
+
+
+if __name__ == "__main__":
+    main()
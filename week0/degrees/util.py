@@ -1,3 +1,7 @@
+import json
+from collections import deque
+
+
 class Node():
     def __init__(self, state, parent, action):
         self.state = state
@@ -7,13 +11,17 @@ class Node():
 
 class StackFrontier():
     def __init__(self):
-        self.frontier = []
+        # Nodes in insertion order, plus a set of their states so that
+        # membership checks don't have to scan the whole frontier
+        self.frontier = deque()
+        self.states = set()
 
     def add(self, node):
         self.frontier.append(node)
+        self.states.add(node.state)
 
     def contains_state(self, state):
-        return any(node.state == state for node in self.frontier)
+        return state in self.states
 
     def empty(self):
         return len(self.frontier) == 0
@@ -22,8 +30,8 @@ class StackFrontier():
         if self.empty():
             raise Exception("empty frontier")
         else:
-            node = self.frontier[-1]
-            self.frontier = self.frontier[:-1]
+            node = self.frontier.pop()
+            self.states.discard(node.state)
             return node
 
 
@@ -33,6 +41,37 @@ class QueueFrontier(StackFrontier):
         if self.empty():
             raise Exception("empty frontier")
         else:
-            node = self.frontier[0]
-            self.frontier = self.frontier[1:]
+            node = self.frontier.popleft()
+            self.states.discard(node.state)
             return node
+
+
+class SearchStats():
+    """
+    Opt-in counters describing the work a search did. Passing the same
+    object to several searches adds their counts together.
+    """
+
+    def __init__(self):
+        self.expanded = 0
+        self.peak_frontier = 0
+        self.neighbor_time = 0.0
+        self.duplicates = 0
+        self.wall_time = 0.0
+
+    def frontier_size(self, size):
+        """Records the current size of the frontier."""
+        if size > self.peak_frontier:
+            self.peak_frontier = size
+
+    def as_dict(self):
+        return {
+            "expanded": self.expanded,
+            "peak_frontier": self.peak_frontier,
+            "neighbor_time": round(self.neighbor_time, 6),
+            "duplicates": self.duplicates,
+            "wall_time": round(self.wall_time, 6),
+        }
+
+    def to_json(self):
+        return json.dumps(self.as_dict())
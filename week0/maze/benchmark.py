@@ -0,0 +1,216 @@
+import argparse
+import csv
+import os
+import signal
+import tempfile
+import time
+import tracemalloc
+
+import generate
+from maze import STRATEGIES, Maze
+
+BUNDLED = ("maze1.txt", "maze2.txt", "maze3.txt")
+
+
+def run(filename, strategies):
+    """
+    Solves the maze in filename with each strategy, returning a list of
+    (strategy, solution length or None, cells explored, seconds).
+    """
+    results = []
+    for strategy in strategies:
+        maze = Maze(filename)
+        start = time.perf_counter()
+        try:
+            maze.solve(strategy=strategy)
+            length = len(maze.solution[0])
+        except Exception:
+            length = None
+        elapsed = time.perf_counter() - start
+        results.append((strategy, length, maze.num_explored, elapsed))
+    return results
+
+
+def report(label, results):
+    """
+    Prints results, raising an exception if a strategy that finds
+    shortest paths found one of a different length than the first.
+    """
+    baseline = results[0]
+    print(label)
+    for strategy, length, explored, elapsed in results:
+        print(f"{strategy:>10}: length {length if length is not None else '-':>6} "
+              f"explored {explored:>9} in {elapsed * 1000:10.3f} ms "
+              f"({baseline[3] / elapsed:6.1f}x)")
+
+    # Every strategy that finds shortest paths must agree with the first
+    for strategy, length, *_ in results[1:]:
+        if strategy != "greedy" and length != baseline[1]:
+            raise Exception(f"{strategy} found length {length}, "
+                            f"{baseline[0]} found {baseline[1]}")
+
+
+class OutOfTime(Exception):
+    pass
+
+
+def out_of_time(signum, frame):
+    raise OutOfTime()
+
+
+def measure(filename, strategy, memory, budget=None):
+    """
+    Solves the maze in filename with strategy, returning (solution length
+    or None, cells explored, seconds, peak bytes allocated while solving
+    or None). The peak is measured in a second, traced run, so that
+    tracing does not slow down the timed one.
+
+    Raises OutOfTime if solving takes longer than budget seconds.
+    """
+    maze = Maze(filename)
+    if budget is not None:
+        signal.signal(signal.SIGALRM, out_of_time)
+        signal.setitimer(signal.ITIMER_REAL, budget)
+    start = time.perf_counter()
+    try:
+        maze.solve(strategy=strategy)
+        length = len(maze.solution[0])
+    except OutOfTime:
+        raise
+    except Exception:
+        length = None
+    finally:
+        if budget is not None:
+            signal.setitimer(signal.ITIMER_REAL, 0)
+    elapsed = time.perf_counter() - start
+    explored = maze.num_explored
+
+    peak = None
+    if memory:
+        maze = Maze(filename)
+        tracemalloc.start()
+        try:
+            maze.solve(strategy=strategy)
+        except Exception:
+            pass
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    return length, explored, elapsed, peak
+
+
+def scaling(kinds, sizes, strategies, budget, memory, seed, output=None):
+    """
+    Solves generated mazes of each kind at each size with every strategy,
+    printing time and memory against the number of cells, and writing
+    the same rows to the csv.writer output if given.
+
+    Once a strategy takes longer than budget seconds on a kind of maze,
+    it is stopped and left out of the larger sizes of that kind.
+    """
+    print(f"{'kind':<12}{'size':>6}{'cells':>11}  {'strategy':<10}"
+          f"{'length':>8}{'explored':>10}{'time (ms)':>12}{'peak (MiB)':>12}")
+    if output is not None:
+        output.writerow(["kind", "size", "cells", "strategy", "length",
+                         "explored", "seconds", "peak_bytes"])
+
+    with tempfile.TemporaryDirectory() as temporary:
+        filename = os.path.join(temporary, "maze.txt")
+        for kind in kinds:
+            stopped = set()
+            for size in sizes:
+                generate.write_maze(filename, *generate.generate(kind, size, size, seed))
+                for strategy in strategies:
+                    if strategy in stopped:
+                        continue
+                    try:
+                        length, explored, elapsed, peak = measure(
+                            filename, strategy, memory, budget
+                        )
+                    except OutOfTime:
+                        print(f"{kind:<12}{size:>6}{size * size:>11}  {strategy:<10}"
+                              f"  over the {budget:g}s budget, stopped scaling")
+                        stopped.add(strategy)
+                        continue
+                    length_text = length if length is not None else "-"
+                    peak_text = f"{peak / 2 ** 20:.2f}" if peak is not None else "-"
+                    print(f"{kind:<12}{size:>6}{size * size:>11}  {strategy:<10}"
+                          f"{length_text:>8}{explored:>10}"
+                          f"{elapsed * 1000:>12.1f}{peak_text:>12}")
+                    if output is not None:
+                        output.writerow([kind, size, size * size, strategy, length,
+                                         explored, elapsed, peak])
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Compare maze solving strategies on bundled and generated mazes."
+    )
+    parser.add_argument("mazes", nargs="*",
+                        help="maze files to solve (default: the bundled mazes)")
+    parser.add_argument("-s", "--strategies",
+                        help="comma-separated strategies, the first being "
+                             "the baseline (default: bfs,jps, or all of them "
+                             "with --scaling)")
+    parser.add_argument("--sizes",
+                        help="comma-separated sizes of mazes to generate "
+                             "(default: 100,300,1000, or 64 to 2048 with "
+                             "--scaling)")
+    parser.add_argument("--density", type=float, default=0.2,
+                        help="fraction of cells of a random maze that are walls")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--scaling", action="store_true",
+                        help="time every strategy on generated mazes of "
+                             "increasing size")
+    parser.add_argument("--kinds", default=",".join(generate.GENERATORS),
+                        help="comma-separated kinds of maze to generate "
+                             "with --scaling")
+    parser.add_argument("--budget", type=float, default=10.0,
+                        help="seconds a strategy may take on one maze before "
+                             "it is left out of larger ones, with --scaling")
+    parser.add_argument("--no-memory", action="store_true",
+                        help="don't measure peak memory, with --scaling")
+    parser.add_argument("--csv", metavar="FILE",
+                        help="also write the --scaling results to FILE")
+    args = parser.parse_args()
+
+    if args.strategies is None:
+        args.strategies = ",".join(STRATEGIES) if args.scaling else "bfs,jps"
+    if args.sizes is None:
+        args.sizes = "64,128,256,512,1024,2048" if args.scaling else "100,300,1000"
+    strategies = args.strategies.split(",")
+    for strategy in strategies:
+        if strategy not in STRATEGIES:
+            parser.error(f"unknown strategy {strategy!r}")
+    sizes = [int(size) for size in args.sizes.split(",") if size]
+
+    if args.scaling:
+        kinds = args.kinds.split(",")
+        for kind in kinds:
+            if kind not in generate.GENERATORS:
+                parser.error(f"unknown kind of maze {kind!r}")
+        if args.csv is None:
+            scaling(kinds, sizes, strategies, args.budget, not args.no_memory,
+                    args.seed)
+        else:
+            with open(args.csv, "w", newline="") as f:
+                scaling(kinds, sizes, strategies, args.budget,
+                        not args.no_memory, args.seed, csv.writer(f))
+        return
+
+    directory = os.path.dirname(os.path.abspath(__file__))
+    mazes = args.mazes or [os.path.join(directory, name) for name in BUNDLED]
+    for filename in mazes:
+        report(os.path.basename(filename), run(filename, strategies))
+
+    with tempfile.TemporaryDirectory() as temporary:
+        for size in sizes:
+            filename = os.path.join(temporary, f"random{size}.txt")
+            generate.write_maze(filename, *generate.random_walls(
+                size, size, args.density, args.seed
+            ))
+            report(f"random {size}x{size}, density {args.density}",
+                   run(filename, strategies))
+
+
+if __name__ == "__main__":
+    main()
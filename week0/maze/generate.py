@@ -0,0 +1,157 @@
+import argparse
+import random
+
+import numpy as np
+
+
+def backtracker(height, width, seed=None):
+    """
+    Returns (walls, start, goal) for a perfect maze carved by a randomized
+    depth-first search: rooms at odd coordinates, joined by knocking down
+    the wall between each room and an unvisited neighbor, backtracking
+    when there are none.
+    """
+    rows, cols = (height - 1) // 2, (width - 1) // 2
+    if rows < 1 or cols < 1:
+        raise Exception("maze must be at least 3x3")
+    rng = random.Random(seed)
+
+    # Walls as bytes, which are much quicker to set one at a time
+    grid = bytearray(b"\1") * (height * width)
+    visited = bytearray(rows * cols)
+    visited[0] = 1
+    grid[width + 1] = 0
+    stack = [0]
+    while stack:
+        room = stack[-1]
+        row, col = divmod(room, cols)
+        options = []
+        if row > 0 and not visited[room - cols]:
+            options.append((room - cols, -width))
+        if row < rows - 1 and not visited[room + cols]:
+            options.append((room + cols, width))
+        if col > 0 and not visited[room - 1]:
+            options.append((room - 1, -1))
+        if col < cols - 1 and not visited[room + 1]:
+            options.append((room + 1, 1))
+        if not options:
+            stack.pop()
+            continue
+
+        neighbor, step = rng.choice(options)
+        visited[neighbor] = 1
+        cell = (2 * row + 1) * width + 2 * col + 1
+        grid[cell + step] = 0
+        grid[cell + 2 * step] = 0
+        stack.append(neighbor)
+
+    walls = np.frombuffer(grid, dtype=bool).reshape(height, width).copy()
+    return walls, (1, 1), (2 * rows - 1, 2 * cols - 1)
+
+
+def random_walls(height, width, density=0.2, seed=None):
+    """
+    Returns (walls, start, goal) for a grid where each cell is a wall with
+    probability density, from the top left corner to the bottom right.
+    The corners themselves are kept clear, but the maze may still have no
+    solution.
+    """
+    rng = np.random.default_rng(seed)
+    walls = rng.random((height, width)) < density
+    walls[:2, :2] = False
+    walls[-2:, -2:] = False
+    return walls, (0, 0), (height - 1, width - 1)
+
+
+def rooms(height, width, room=8, seed=None):
+    """
+    Returns (walls, start, goal) for a grid of open rooms, room cells
+    across, separated by walls with one door at a random place between
+    every pair of adjacent rooms.
+    """
+    rng = random.Random(seed)
+    walls = np.zeros((height, width), dtype=bool)
+    lines = range(room, height - 1, room + 1)
+    columns = range(room, width - 1, room + 1)
+    walls[list(lines), :] = True
+    walls[:, list(columns)] = True
+
+    # Bands of open cells between the walls, in each direction
+    row_bands = bands(height, lines)
+    col_bands = bands(width, columns)
+    for line in lines:
+        for first, last in col_bands:
+            walls[line, rng.randint(first, last)] = False
+    for column in columns:
+        for first, last in row_bands:
+            walls[rng.randint(first, last), column] = False
+    return walls, (0, 0), (height - 1, width - 1)
+
+
+def bands(size, lines):
+    """Returns the (first, last) cells of each run between the lines."""
+    result = []
+    first = 0
+    for line in list(lines) + [size]:
+        if first < line:
+            result.append((first, line - 1))
+        first = line + 1
+    return result
+
+
+# Kinds of maze that can be generated, by name
+GENERATORS = {
+    "backtracker": backtracker,
+    "random": random_walls,
+    "rooms": rooms,
+}
+
+
+def generate(kind, height, width, seed=None, **options):
+    """Returns (walls, start, goal) for a maze of the given kind."""
+    if kind not in GENERATORS:
+        raise Exception(f"unknown kind of maze {kind!r}")
+    return GENERATORS[kind](height, width, seed=seed, **options)
+
+
+def write_maze(filename, walls, start, goal):
+    """
+    Writes a maze in the text format Maze reads, with # for walls. Every
+    line has the same length, so the file can be memory-mapped.
+    """
+    height, width = walls.shape
+    text = np.full((height, width + 1), ord("\n"), dtype=np.uint8)
+    text[:, :width] = np.where(walls, ord("#"), ord(" "))
+    text[start] = ord("A")
+    text[goal] = ord("B")
+    with open(filename, "wb") as f:
+        text.tofile(f)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate a maze.")
+    parser.add_argument("kind", choices=GENERATORS)
+    parser.add_argument("height", type=int)
+    parser.add_argument("width", type=int, nargs="?",
+                        help="width of the maze (default: its height)")
+    parser.add_argument("-o", "--output", default="maze.txt")
+    parser.add_argument("--seed", type=int)
+    parser.add_argument("--density", type=float, default=0.2,
+                        help="fraction of cells that are walls, for random mazes")
+    parser.add_argument("--room", type=int, default=8,
+                        help="size of each room, for rooms mazes")
+    args = parser.parse_args()
+
+    options = {}
+    if args.kind == "random":
+        options["density"] = args.density
+    elif args.kind == "rooms":
+        options["room"] = args.room
+    width = args.width if args.width is not None else args.height
+    walls, start, goal = generate(args.kind, args.height, width, args.seed, **options)
+    write_maze(args.output, walls, start, goal)
+    print(f"Wrote {args.output}.")
+
+
+if __name__ == "__main__":
+    main()
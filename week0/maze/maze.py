@@ -1,4 +1,14 @@
-import sys
+import argparse
+import heapq
+import json
+import mmap
+import os
+import time
+from collections import deque
+from collections.abc import Set
+
+import numpy as np
+
 
 class Node():
     def __init__(self, state, parent, action):
@@ -9,13 +19,17 @@ class Node():
 
 class StackFrontier():
     def __init__(self):
-        self.frontier = []
+        # Nodes in insertion order, plus a set of their states so that
+        # membership checks don't have to scan the whole frontier
+        self.frontier = deque()
+        self.states = set()
 
     def add(self, node):
         self.frontier.append(node)
+        self.states.add(node.state)
 
     def contains_state(self, state):
-        return any(node.state == state for node in self.frontier)
+        return state in self.states
 
     def empty(self):
         return len(self.frontier) == 0
@@ -24,8 +38,8 @@ class StackFrontier():
         if self.empty():
             raise Exception("empty frontier")
         else:
-            node = self.frontier[-1]
-            self.frontier = self.frontier[:-1]
+            node = self.frontier.pop()
+            self.states.discard(node.state)
             return node
 
 
@@ -35,107 +49,409 @@ class QueueFrontier(StackFrontier):
         if self.empty():
             raise Exception("empty frontier")
         else:
-            node = self.frontier[0]
-            self.frontier = self.frontier[1:]
+            node = self.frontier.popleft()
+            self.states.discard(node.state)
             return node
 
+
+class PriorityFrontier():
+    def __init__(self):
+        # Binary heap of (priority, insertion order, node), so that nodes of
+        # equal priority come out first in, first out
+        self.frontier = []
+        self.count = 0
+
+    def add(self, node, priority):
+        heapq.heappush(self.frontier, (priority, self.count, node))
+        self.count += 1
+
+    def empty(self):
+        return len(self.frontier) == 0
+
+    def remove(self):
+        if self.empty():
+            raise Exception("empty frontier")
+        else:
+            return heapq.heappop(self.frontier)[2]
+
+
+class CellSet(Set):
+    """
+    Set of the cells of a maze that are marked in a mask over its padded
+    grid, so that large searches need not build a set of tuples.
+    """
+
+    def __init__(self, maze, mask):
+        self.maze = maze
+        self.mask = mask
+
+    def __contains__(self, state):
+        row, col = state
+        return (0 <= row < self.maze.height and 0 <= col < self.maze.width
+                and bool(self.mask[self.maze.index(state)]))
+
+    def __iter__(self):
+        for index in np.flatnonzero(self.mask):
+            yield self.maze.cell(int(index))
+
+    def __len__(self):
+        return int(np.count_nonzero(self.mask))
+
+
+class SearchStats():
+    """
+    Opt-in counters describing the work a search did. Passing the same
+    object to several searches adds their counts together.
+    """
+
+    def __init__(self):
+        self.expanded = 0
+        self.peak_frontier = 0
+        self.neighbor_time = 0.0
+        self.duplicates = 0
+        self.wall_time = 0.0
+
+    def frontier_size(self, size):
+        """Records the current size of the frontier."""
+        if size > self.peak_frontier:
+            self.peak_frontier = size
+
+    def as_dict(self):
+        return {
+            "expanded": self.expanded,
+            "peak_frontier": self.peak_frontier,
+            "neighbor_time": round(self.neighbor_time, 6),
+            "duplicates": self.duplicates,
+            "wall_time": round(self.wall_time, 6),
+        }
+
+    def to_json(self):
+        return json.dumps(self.as_dict())
+
+
+# Whether each byte of an ASCII maze file is a wall: anything other than a
+# space, A or B is
+WALL_BYTES = np.ones(256, dtype=bool)
+WALL_BYTES[[ord(" "), ord("A"), ord("B")]] = False
+
+
+# Classes of cell that print and output_image distinguish, and how each
+# one looks
+EMPTY, WALL, START, GOAL, SOLUTION, EXPLORED = range(6)
+CHARACTERS = np.array([" ", "█", "A", "B", "*", " "])
+COLORS = np.array([
+    (237, 240, 252),
+    (40, 40, 40),
+    (255, 0, 0),
+    (0, 171, 28),
+    (220, 235, 113),
+    (212, 97, 85),
+], dtype=np.uint8)
+
+# The same colors, and black, as RGBA pixels packed into one uint32 each,
+# which are much quicker to repeat than three separate bytes
+PIXELS = np.hstack([
+    COLORS, np.full((len(COLORS), 1), 255, dtype=np.uint8)
+]).view(np.uint32).ravel()
+BLACK = np.array([0, 0, 0, 255], dtype=np.uint8).view(np.uint32)[0]
+
+
+# Cells of a fixed-width maze file converted at a time
+BLOCK_CELLS = 1 << 20
+
+
+# Search strategies Maze.solve can use, and the method implementing each
+STRATEGIES = {
+    "bfs": "breadth_first",
+    "astar": "astar",
+    "greedy": "greedy",
+    "idastar": "idastar",
+    "wavefront": "wavefront",
+    "field": "field_path",
+    "jps": "jump_point",
+}
+
+
 class Maze():
 
     def __init__(self, filename):
 
-        # Read file and set height and width of maze
-        with open(filename) as f:
-            contents = f.read()
+        # Fixed-width files are read in place, anything else a line at a time
+        starts, goals = self.read_fixed_width(filename) or self.read_lines(filename)
 
         # Validate start and goal
-        if contents.count("A") != 1:
+        if starts != 1:
             raise Exception("maze must have exactly one start point")
-        if contents.count("B") != 1:
+        if goals != 1:
             raise Exception("maze must have exactly one goal")
-
-        # Determine height and width of maze
-        contents = contents.splitlines()
-        self.height = len(contents)
-        self.width = max(len(line) for line in contents)
-
-        # Keep track of walls
-        self.walls = []
-        for i in range(self.height):
-            row = []
-            for j in range(self.width):
-                try:
-                    if contents[i][j] == "A":
-                        self.start = (i, j)
-                        row.append(False)
-                    elif contents[i][j] == "B":
-                        self.goal = (i, j)
-                        row.append(False)
-                    elif contents[i][j] == " ":
-                        row.append(False)
-                    else:
-                        row.append(True)
-                except IndexError:
-                    row.append(False)
-            self.walls.append(row)
+        self.pad()
 
         self.solution = None
+        self.field = None
+
+
+    def read_lines(self, filename):
+        """
+        Reads the maze one line at a time straight into the wall grid,
+        finding the start and goal on the way. Returns the number of
+        starts and goals seen.
+
+        Short lines are padded with open cells. The grid has room for as
+        many rows as the widest line so far suggests the file has, and
+        grows if that is not enough.
+        """
+        starts = goals = 0
+        walls = None
+        height = width = 0
+        with open(filename, "rb") as f:
+            size = os.fstat(f.fileno()).st_size
+            remaining = size
+            for line in f:
+                remaining -= len(line)
+                line = line.rstrip(b"\r\n")
+                if line.isascii():
+                    row = WALL_BYTES[np.frombuffer(line, dtype=np.uint8)]
+                else:
+                    # Count characters, not bytes, in anything else
+                    row = np.frombuffer(
+                        line.decode("utf-8").encode("utf-32-le"), dtype="<u4"
+                    )
+                    row = (row != ord(" ")) & (row != ord("A")) & (row != ord("B"))
+
+                if walls is None:
+                    width = len(row)
+                    rows = size // (len(line) + 1) + 1
+                    walls = np.zeros((rows, width), dtype=bool)
+                elif height == len(walls):
+                    walls.resize((2 * height, width), refcheck=False)
+                if len(row) > width:
+                    rows = height + remaining // (len(line) + 1) + 1
+                    wider = np.zeros((rows, len(row)), dtype=bool)
+                    wider[:height, :width] = walls[:height]
+                    walls = wider
+                    width = len(row)
+                walls[height, :len(row)] = row
+
+                # A and B are single bytes in UTF-8, so they can be counted
+                # as bytes, but their column is the character they are at
+                if b"A" in line:
+                    starts += line.count(b"A")
+                    self.start = (height, line.decode("utf-8").index("A"))
+                if b"B" in line:
+                    goals += line.count(b"B")
+                    self.goal = (height, line.decode("utf-8").index("B"))
+                height += 1
+
+        if walls is None:
+            walls = np.zeros((0, 0), dtype=bool)
+        walls.resize((height, width), refcheck=False)
+        self.walls = walls
+        self.height = height
+        self.width = width
+        return starts, goals
+
+
+    def read_fixed_width(self, filename):
+        """
+        Reads an ASCII maze whose lines all have the same length by
+        memory-mapping it and viewing it as a 2D array of bytes, returning
+        the number of starts and goals seen. Returns None if the file is
+        not laid out that way.
+        """
+        with open(filename, "rb") as f:
+            size = os.fstat(f.fileno()).st_size
+            if size == 0:
+                return None
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+
+                # Every line must end like the first, including the last
+                end = buffer.find(b"\n")
+                if end < 0:
+                    return None
+                separator = b"\r\n" if buffer[end - 1:end] == b"\r" else b"\n"
+                width = end + 1 - len(separator)
+                if size % (end + 1):
+                    return None
+
+                grid = np.frombuffer(buffer, dtype=np.uint8).reshape(-1, end + 1)
+                newline = np.frombuffer(separator, dtype=np.uint8)
+                walls = np.empty((len(grid), width), dtype=bool)
+                starts = []
+                goals = []
+
+                # Check and convert a block of rows at a time, to keep the
+                # temporary arrays small
+                fixed = True
+                rows = max(1, BLOCK_CELLS // (end + 1))
+                for top in range(0, len(grid), rows):
+                    block = grid[top:top + rows]
+                    cells = block[:, :width]
+                    if (not np.all(block[:, width:] == newline)
+                            or cells.max(initial=0) >= 0x80
+                            or np.any(cells == ord("\r"))):
+                        fixed = False
+                        break
+                    walls[top:top + rows] = WALL_BYTES[cells]
+                    starts.extend(np.flatnonzero(cells == ord("A")) + top * width)
+                    goals.extend(np.flatnonzero(cells == ord("B")) + top * width)
+
+                # Arrays viewing the buffer must go before it can close
+                del grid, block, cells
+
+        if not fixed:
+            return None
+        self.walls = walls
+        self.height, self.width = walls.shape
+        if len(starts) == 1:
+            self.start = divmod(int(starts[0]), width)
+        if len(goals) == 1:
+            self.goal = divmod(int(goals[0]), width)
+        return len(starts), len(goals)
+
+
+    def pad(self):
+        """
+        Builds the flat grid that searches use: walls surrounded by a
+        border of walls, so that moving off any open cell lands on a valid
+        index, with cell (i, j) at index (i + 1) * stride + j + 1.
+        """
+        self.stride = self.width + 2
+        self.passable = np.zeros((self.height + 2, self.stride), dtype=bool)
+        np.logical_not(self.walls, out=self.passable[1:-1, 1:-1])
+        self.passable = self.passable.ravel()
+
+        # A view of the same grid, which is quicker to index one at a time
+        self.open_cells = memoryview(self.passable)
+
+
+    def index(self, state):
+        """Returns the position of a cell in the padded grid."""
+        return (state[0] + 1) * self.stride + state[1] + 1
+
+
+    def cell(self, index):
+        """Returns the cell at a position in the padded grid."""
+        row, col = divmod(index, self.stride)
+        return (row - 1, col - 1)
 
 
     def print(self):
-        solution = self.solution[1] if self.solution is not None else None
+        cells = self.classes(show_solution=True, show_explored=False)
         print()
-        for i, row in enumerate(self.walls):
-            for j, col in enumerate(row):
-                if col:
-                    print("█", end="")
-                elif (i, j) == self.start:
-                    print("A", end="")
-                elif (i, j) == self.goal:
-                    print("B", end="")
-                elif solution is not None and (i, j) in solution:
-                    print("*", end="")
-                else:
-                    print(" ", end="")
-            print()
+        for row in CHARACTERS[cells]:
+            print("".join(row))
         print()
 
 
+    def classes(self, show_solution, show_explored):
+        """
+        Returns an array giving the class of each cell (an index into
+        CHARACTERS and COLORS), painted from lowest to highest precedence.
+        """
+        cells = np.zeros((self.height, self.width), dtype=np.uint8)
+        if self.solution is not None:
+            if show_explored:
+                cells[self.mask(self.explored)] = EXPLORED
+            if show_solution:
+                cells[self.mask(self.solution[1])] = SOLUTION
+        cells[self.goal] = GOAL
+        cells[self.start] = START
+        cells[self.walls] = WALL
+        return cells
+
+
+    def mask(self, cells):
+        """Returns a bool array marking the given cells of the maze."""
+        if isinstance(cells, CellSet) and cells.maze is self:
+            return cells.mask.reshape(self.height + 2, self.stride)[1:-1, 1:-1]
+        mask = np.zeros((self.height, self.width), dtype=bool)
+        cells = np.array(list(cells), dtype=np.intp).reshape(-1, 2)
+        mask[cells[:, 0], cells[:, 1]] = True
+        return mask
+
+
     def neighbors(self, state):
         row, col = state
-        candidates = [
-            ("up", (row - 1, col)),
-            ("down", (row + 1, col)),
-            ("left", (row, col - 1)),
-            ("right", (row, col + 1))
-        ]
-
+        index = self.index(state)
+        open_cells = self.open_cells
         result = []
-        for action, (r, c) in candidates:
-            if 0 <= r < self.height and 0 <= c < self.width and not self.walls[r][c]:
-                result.append((action, (r, c)))
+        for action, dr, dc, step in self.moves():
+            if open_cells[index + step]:
+                result.append((action, (row + dr, col + dc)))
         return result
 
 
-    def solve(self):
-        """Finds a solution to maze, if one exists."""
+    def moves(self):
+        """Returns (action, row change, column change, index change) moves."""
+        return (
+            ("up", -1, 0, -self.stride),
+            ("down", 1, 0, self.stride),
+            ("left", 0, -1, -1),
+            ("right", 0, 1, 1)
+        )
+
+
+    def heuristic(self, state):
+        """Manhattan distance from state to the goal."""
+        return abs(state[0] - self.goal[0]) + abs(state[1] - self.goal[1])
+
+
+    def solve(self, stats=None, strategy="bfs"):
+        """
+        Finds a solution to maze, if one exists, using one of STRATEGIES.
+        If given, stats is a SearchStats that records the search's work.
+        """
+        if strategy not in STRATEGIES:
+            raise Exception(f"unknown strategy {strategy!r}")
+        started = time.perf_counter()
 
         # Keep track of number of states explored
         self.num_explored = 0
+        self.explored = set()
+
+        node = getattr(self, STRATEGIES[strategy])(stats)
+        self.solve_time = time.perf_counter() - started
+        if stats is not None:
+            stats.wall_time += self.solve_time
+        if node is None:
+            raise Exception("no solution")
+        self.solution = self.trace(node)
+
+
+    def trace(self, node):
+        """Returns the (actions, cells) that lead from the start to node."""
+        actions = []
+        cells = []
+        while node.parent is not None:
+            actions.append(node.action)
+            cells.append(node.state)
+            node = node.parent
+        actions.reverse()
+        cells.reverse()
+        return (actions, cells)
+
+
+    def expand(self, state, stats):
+        """Returns the neighbors of state, counting the expansion in stats."""
+        if stats is None:
+            return self.neighbors(state)
+        stats.expanded += 1
+        generating = time.perf_counter()
+        neighbors = self.neighbors(state)
+        stats.neighbor_time += time.perf_counter() - generating
+        return neighbors
+
+
+    def breadth_first(self, stats):
+        """Breadth-first search, returning the goal node or None."""
 
         # Initialize frontier to just the starting position
         start = Node(state=self.start, parent=None, action=None)
         frontier = QueueFrontier()
         frontier.add(start)
 
-        # Initialize an empty explored set
-        self.explored = set()
-
         # Keep looping until solution found
-        while True:
-
-            # If nothing left in frontier, then no path
-            if frontier.empty():
-                raise Exception("no solution")
+        while not frontier.empty():
 
             # Choose a node from the frontier
             node = frontier.remove()
@@ -143,87 +459,515 @@ class Maze():
 
             # If node is the goal, then we have a solution
             if node.state == self.goal:
-                actions = []
-                cells = []
-                while node.parent is not None:
-                    actions.append(node.action)
-                    cells.append(node.state)
-                    node = node.parent
-                actions.reverse()
-                cells.reverse()
-                self.solution = (actions, cells)
-                return
+                return node
 
             # Mark node as explored
             self.explored.add(node.state)
 
             # Add neighbors to frontier
-            for action, state in self.neighbors(node.state):
+            for action, state in self.expand(node.state, stats):
                 if not frontier.contains_state(state) and state not in self.explored:
                     child = Node(state=state, parent=node, action=action)
                     frontier.add(child)
+                elif stats is not None:
+                    stats.duplicates += 1
+            if stats is not None:
+                stats.frontier_size(len(frontier.frontier))
+        return None
+
+
+    def wavefront(self, stats):
+        """
+        Breadth-first search that expands a whole level of the frontier at
+        a time with array operations on the padded grid, returning the goal
+        node or None.
+        """
+        came_from = np.full(self.passable.size, -1, dtype=np.int8)
+        goal = self.index(self.goal)
+        expanded = 0
+        for frontier in self.levels(came_from, stats):
+            if came_from[goal] >= 0:
+                break
+            expanded += frontier.size
+        else:
+            self.explored = CellSet(self, came_from >= 0)
+            self.num_explored = expanded
+            return None
+
+        # A queue would have explored every earlier level, and the goal's
+        # level up to the goal, since levels are kept in queue order
+        position = int(np.flatnonzero(frontier == goal)[0])
+        reached = came_from >= 0
+        reached[frontier[position:]] = False
+        self.explored = CellSet(self, reached)
+        self.num_explored = expanded + position + 1
+        return self.walk_back(came_from, goal)
+
+
+    def levels(self, came_from, stats=None):
+        """
+        Yields each level of a breadth-first search from the start, as an
+        array of positions in the padded grid, expanding it once the
+        caller asks for the next. Marks in came_from (-1 for cells not yet
+        reached) the index of the move that first reached each cell.
+
+        Each level is in the order a queue would hold it, and each cell
+        is reached from the cell a queue would reach it from first, so
+        paths and counts match breadth_first.
+        """
+        moves = self.moves()
+        steps = np.array([step for *_, step in moves])
+        start = self.index(self.start)
+        came_from[start] = len(moves)
+        frontier = np.array([start])
+
+        # Scratch space for finding the first time each cell is reached
+        first_seen = np.empty(self.passable.size, dtype=np.int32)
+
+        while frontier.size:
+            yield frontier
+            if stats is not None:
+                stats.expanded += frontier.size
+                generating = time.perf_counter()
+
+            # Every move from every frontier cell, in the order a queue
+            # would generate them: by cell, then by move
+            candidates = (frontier[:, np.newaxis] + steps).ravel()
+            move = np.tile(np.arange(len(moves), dtype=np.int8), frontier.size)
+            fresh = self.passable[candidates] & (came_from[candidates] < 0)
+            reached, move = candidates[fresh], move[fresh]
+
+            # Keep only the first time each cell is reached, in order:
+            # writing positions in reverse leaves the first one standing
+            positions = np.arange(reached.size, dtype=np.int32)
+            first_seen[reached[::-1]] = positions[::-1]
+            first = first_seen[reached] == positions
+            frontier = reached[first]
+            came_from[frontier] = move[first]
+
+            if stats is not None:
+                stats.neighbor_time += time.perf_counter() - generating
+                stats.duplicates += candidates.size - frontier.size
+                stats.frontier_size(frontier.size)
+
+
+    def walk_back(self, came_from, index):
+        """
+        Follows the moves in came_from back from a position in the padded
+        grid to the start, returning the node for that position.
+        """
+        moves = self.moves()
+        start = self.index(self.start)
+        path = []
+        while index != start:
+            move = moves[came_from[index]]
+            path.append((move[0], self.cell(index)))
+            index -= move[3]
+        node = Node(state=self.start, parent=None, action=None)
+        for action, state in reversed(path):
+            node = Node(state=state, parent=node, action=action)
+        return node
+
+
+    def distance_field(self, stats=None):
+        """
+        Returns (distance, came_from) arrays over the padded grid, giving
+        the number of steps from the start to every cell (-1 if it cannot
+        be reached) and the index of the move that reached it.
+
+        Computed by one full breadth-first search on first use, and then
+        kept, so that paths to any number of cells cost only a walk back.
+        If given, stats records the work of that search.
+        """
+        if self.field is None:
+            came_from = np.full(self.passable.size, -1, dtype=np.int8)
+            distance = np.full(self.passable.size, -1, dtype=np.int32)
+            for steps, frontier in enumerate(self.levels(came_from, stats)):
+                distance[frontier] = steps
+            self.field = (distance, came_from)
+        return self.field
+
+
+    def distance_to(self, state):
+        """Returns the number of steps from the start to state, or None."""
+        distance = int(self.distance_field()[0][self.index(state)])
+        return distance if distance >= 0 else None
+
+
+    def path_to(self, state):
+        """
+        Returns the (actions, cells) of a shortest path from the start to
+        state, or None if there is none.
+        """
+        if self.distance_to(state) is None:
+            return None
+        return self.trace(self.walk_back(self.distance_field()[1], self.index(state)))
+
+
+    def field_path(self, stats):
+        """
+        Walks the distance field back from the goal, computing it first
+        unless it is already cached.
+        """
+        distance, came_from = self.distance_field(stats)
+        self.explored = CellSet(self, distance >= 0)
+        self.num_explored = len(self.explored)
+        if distance[self.index(self.goal)] < 0:
+            return None
+        return self.walk_back(came_from, self.index(self.goal))
+
+
+    def save_field(self, filename):
+        """
+        Saves the distance field as a height x width .npy array of steps
+        from the start, -1 where a cell cannot be reached.
+        """
+        distance = self.distance_field()[0]
+        with open(filename, "wb") as f:
+            np.save(f, distance.reshape(self.height + 2, self.stride)[1:-1, 1:-1])
+
+
+    def load_field(self, filename):
+        """
+        Loads a distance field saved by save_field, rebuilding the moves
+        that reached each cell from it.
+        """
+        saved = np.load(filename)
+        if (saved.shape != (self.height, self.width) or saved[self.start] != 0
+                or np.any(saved[self.walls] >= 0)):
+            raise Exception("distance field does not match maze")
+        distance = np.full((self.height + 2, self.stride), -1, dtype=np.int32)
+        distance[1:-1, 1:-1] = saved
+        distance = distance.ravel()
+
+        # Each reached cell came by the first move from a cell one step
+        # nearer the start; the border of the padded grid stops any move
+        # from wrapping around
+        moves = self.moves()
+        came_from = np.full(distance.size, -1, dtype=np.int8)
+        for move in reversed(range(len(moves))):
+            previous = np.roll(distance, moves[move][3])
+            came_from[(distance > 0) & (previous == distance - 1)] = move
+        if np.any((distance > 0) & (came_from < 0)):
+            raise Exception("distance field does not match maze")
+        came_from[self.index(self.start)] = len(moves)
+        self.field = (distance, came_from)
+
+
+    def astar(self, stats):
+        """A* search with the Manhattan distance heuristic."""
+        return self.best_first(stats, weight=1)
+
+
+    def greedy(self, stats):
+        """Greedy best-first search, by Manhattan distance alone."""
+        return self.best_first(stats, weight=0)
+
+
+    def best_first(self, stats, weight):
+        """
+        Expands cells in order of weight * steps + heuristic, breaking ties
+        toward the goal, and returns the goal node or None.
+        """
+        start = Node(state=self.start, parent=None, action=None)
+        frontier = PriorityFrontier()
+        h = self.heuristic(self.start)
+        frontier.add(start, (h, h))
 
+        # Fewest steps found so far to each cell
+        steps = {self.start: 0}
 
-    def output_image(self, filename, show_solution=True, show_explored=False):
-        from PIL import Image, ImageDraw
-        cell_size = 50
-        cell_border = 2
-
-        # Create a blank canvas
-        img = Image.new(
-            "RGBA",
-            (self.width * cell_size, self.height * cell_size),
-            "black"
-        )
-        draw = ImageDraw.Draw(img)
-
-        solution = self.solution[1] if self.solution is not None else None
-        for i, row in enumerate(self.walls):
-            for j, col in enumerate(row):
-
-                # Walls
-                if col:
-                    fill = (40, 40, 40)
-
-                # Start
-                elif (i, j) == self.start:
-                    fill = (255, 0, 0)
-
-                # Goal
-                elif (i, j) == self.goal:
-                    fill = (0, 171, 28)
+        while not frontier.empty():
+            node = frontier.remove()
 
-                # Solution
-                elif solution is not None and show_solution and (i, j) in solution:
-                    fill = (220, 235, 113)
+            # A cell can be queued again after a shorter way to it is found
+            if node.state in self.explored:
+                continue
+            self.num_explored += 1
 
-                # Explored
-                elif solution is not None and show_explored and (i, j) in self.explored:
-                    fill = (212, 97, 85)
+            if node.state == self.goal:
+                return node
+            self.explored.add(node.state)
 
-                # Empty cell
-                else:
-                    fill = (237, 240, 252)
-
-                # Draw cell
-                draw.rectangle(
-                    ([(j * cell_size + cell_border, i * cell_size + cell_border),
-                      ((j + 1) * cell_size - cell_border, (i + 1) * cell_size - cell_border)]),
-                    fill=fill
-                )
-
-        img.save(filename)
-
-
-if len(sys.argv) != 2:
-    sys.exit("Usage: python maze.py maze.txt")
-
-m = Maze(sys.argv[1])
-print("Maze:")
-m.print()
-print("Solving...")
-m.solve()
-print("States Explored:", m.num_explored)
-print("Solution:")
-m.print()
-m.output_image("maze.png", show_explored=True)
+            cost = steps[node.state] + 1
+            for action, state in self.expand(node.state, stats):
+                if state not in self.explored and cost < steps.get(state, cost + 1):
+                    steps[state] = cost
+                    h = self.heuristic(state)
+                    child = Node(state=state, parent=node, action=action)
+                    frontier.add(child, (weight * cost + h, h))
+                elif stats is not None:
+                    stats.duplicates += 1
+            if stats is not None:
+                stats.frontier_size(len(frontier.frontier))
+        return None
+
+
+    def jump_point(self, stats):
+        """
+        Jump Point Search for a 4-connected grid: A* over only the cells
+        where an optimal path might turn, found by jumping in straight
+        lines, rather than over every cell. Returns the goal node, with a
+        node for every cell along the way, or None.
+
+        Moving horizontally, a jump stops where a wall beside the line
+        ends, opening a way up or down. Moving vertically, it also stops
+        wherever a horizontal jump from the cell would stop, so paths
+        through open rooms are only ever bent where they must be.
+        """
+        start, goal = self.index(self.start), self.index(self.goal)
+        node = Node(state=start, parent=None, action=None)
+        frontier = PriorityFrontier()
+        h = self.heuristic(self.start)
+        frontier.add(node, (h, h))
+
+        # Fewest steps found so far to each jump point
+        steps = {start: 0}
+        closed = set()
+
+        while not frontier.empty():
+            node = frontier.remove()
+            if node.state in closed:
+                continue
+            closed.add(node.state)
+            self.num_explored += 1
+            self.explored.add(self.cell(node.state))
+
+            if node.state == goal:
+                return self.walk_jumps(node)
+
+            if stats is not None:
+                stats.expanded += 1
+                generating = time.perf_counter()
+            successors = []
+            for step in self.jump_directions(node):
+                point = self.jump(node.state, step, goal)
+                if point is not None:
+                    successors.append(point)
+            if stats is not None:
+                stats.neighbor_time += time.perf_counter() - generating
+
+            for point in successors:
+
+                # Jump points lie on a straight line from the node
+                span = abs(point - node.state)
+                cost = steps[node.state] + (span if span < self.stride else span // self.stride)
+                if point not in closed and cost < steps.get(point, cost + 1):
+                    steps[point] = cost
+                    h = self.heuristic(self.cell(point))
+                    frontier.add(Node(state=point, parent=node, action=None), (cost + h, h))
+                elif stats is not None:
+                    stats.duplicates += 1
+            if stats is not None:
+                stats.frontier_size(len(frontier.frontier))
+        return None
+
+
+    def jump_directions(self, node):
+        """
+        Returns the steps worth jumping in from a jump point: every way
+        from the start, and otherwise straight on or to either side.
+        """
+        if node.parent is None:
+            return [step for *_, step in self.moves()]
+        step = self.direction(node.parent.state, node.state)
+        side = self.stride if abs(step) == 1 else 1
+        return [step, side, -side]
+
+
+    def direction(self, source, target):
+        """Returns the step from source toward target on the same line."""
+        difference = target - source
+        if abs(difference) < self.stride:
+            return 1 if difference > 0 else -1
+        return self.stride if difference > 0 else -self.stride
+
+
+    def jump(self, index, step, goal):
+        """
+        Moves from index by step until reaching a jump point, returning
+        it, or a wall, returning None.
+        """
+        open_cells = self.open_cells
+        horizontal = abs(step) == 1
+        side = self.stride if horizontal else 1
+        while True:
+            index += step
+            if not open_cells[index]:
+                return None
+            if index == goal:
+                return index
+
+            # A wall beside the previous cell that is gone beside this one
+            if ((open_cells[index + side] and not open_cells[index - step + side])
+                    or (open_cells[index - side]
+                        and not open_cells[index - step - side])):
+                return index
+            if not horizontal and (
+                    self.jump(index, 1, goal) is not None
+                    or self.jump(index, -1, goal) is not None):
+                return index
+
+
+    def walk_jumps(self, node):
+        """
+        Fills in the cells between the jump points leading to node,
+        returning the node for its last cell.
+        """
+        points = []
+        while node is not None:
+            points.append(node.state)
+            node = node.parent
+        points.reverse()
+
+        actions = {step: action for action, *_, step in self.moves()}
+        node = Node(state=self.start, parent=None, action=None)
+        for source, target in zip(points, points[1:]):
+            step = self.direction(source, target)
+            index = source
+            while index != target:
+                index += step
+                node = Node(state=self.cell(index), parent=node, action=actions[step])
+        return node
+
+
+    def idastar(self, stats):
+        """
+        Iterative deepening A*: depth-first searches bounded by
+        steps + heuristic, raising the bound to the smallest value that
+        exceeded it until the goal is reached.
+        """
+        bound = self.heuristic(self.start)
+        while bound is not None:
+            node, bound = self.bounded_search(bound, stats)
+            if node is not None:
+                return node
+        return None
+
+
+    def bounded_search(self, bound, stats):
+        """
+        One depth-first pass of IDA*, returning (goal node, None) if it
+        finds the goal and otherwise (None, next bound), which is None if
+        nothing was cut off.
+
+        Cells already reached in this pass in as few steps are not searched
+        again, which keeps a pass from retracing every path through open
+        areas of the maze.
+        """
+        start = Node(state=self.start, parent=None, action=None)
+        self.num_explored += 1
+        self.explored.add(self.start)
+        if self.start == self.goal:
+            return start, None
+
+        reached = {self.start: 0}
+        stack = [(start, 0, iter(self.expand(self.start, stats)))]
+        next_bound = None
+        while stack:
+            node, steps, children = stack[-1]
+            for action, state in children:
+                cost = steps + 1
+                if reached.get(state, cost + 1) <= cost:
+                    if stats is not None:
+                        stats.duplicates += 1
+                    continue
+                f = cost + self.heuristic(state)
+                if f > bound:
+                    if next_bound is None or f < next_bound:
+                        next_bound = f
+                    continue
+
+                reached[state] = cost
+                child = Node(state=state, parent=node, action=action)
+                self.num_explored += 1
+                self.explored.add(state)
+                if state == self.goal:
+                    return child, None
+                stack.append((child, cost, iter(self.expand(state, stats))))
+                if stats is not None:
+                    stats.frontier_size(len(stack))
+                break
+            else:
+                stack.pop()
+        return None, next_bound
+
+
+    def output_image(self, filename, show_solution=True, show_explored=False,
+                     cell_size=50, cell_border=2):
+        from PIL import Image
+
+        # Repeat each cell's color across and then down its square,
+        # blacking out the border around it
+        inside = np.zeros(cell_size, dtype=bool)
+        inside[cell_border:cell_size - cell_border + 1] = True
+        pixels = PIXELS[self.classes(show_solution, show_explored)]
+        pixels = np.repeat(pixels, cell_size, axis=1)
+        pixels[:, ~np.tile(inside, self.width)] = BLACK
+        pixels = np.repeat(pixels, cell_size, axis=0)
+        pixels[~np.tile(inside, self.height)] = BLACK
+
+        image = pixels.view(np.uint8).reshape(*pixels.shape, 4)
+        Image.fromarray(image, "RGBA").save(filename)
+
+
+def compare(maze):
+    """Solves maze with every strategy, printing how each one did."""
+    print(f"{'Strategy':<10}{'Length':>8}{'Explored':>10}{'Time (ms)':>12}")
+    for strategy in STRATEGIES:
+        try:
+            maze.solve(strategy=strategy)
+            length = len(maze.solution[0])
+        except Exception:
+            length = "-"
+        print(f"{strategy:<10}{length:>8}{maze.num_explored:>10}"
+              f"{maze.solve_time * 1000:>12.3f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Solve a maze.")
+    parser.add_argument("maze")
+    parser.add_argument("--strategy", choices=STRATEGIES, default="bfs",
+                        help="search strategy to solve the maze with")
+    parser.add_argument("--compare", action="store_true",
+                        help="solve with every strategy and compare them")
+    parser.add_argument("--field", metavar="FILE",
+                        help="solve from the distance field saved in FILE, "
+                             "computing and saving it first if there is none")
+    parser.add_argument("--stats", action="store_true",
+                        help="print statistics about the search as JSON")
+    args = parser.parse_args()
+
+    m = Maze(args.maze)
+    saving = args.field is not None and not os.path.exists(args.field)
+    if args.field is not None:
+        if not saving:
+            m.load_field(args.field)
+        args.strategy = "field"
+
+    # A field that isn't saved yet is computed while solving, so that the
+    # search's stats count its work, and saved afterwards
+    try:
+        if args.compare:
+            compare(m)
+            return
+
+        print("Maze:")
+        m.print()
+        print("Solving...")
+        stats = SearchStats() if args.stats else None
+        m.solve(stats, args.strategy)
+        print("States Explored:", m.num_explored)
+        print(f"Time: {m.solve_time * 1000:.3f} ms")
+        print("Solution:")
+        m.print()
+        m.output_image("maze.png", show_explored=True)
+        if stats is not None:
+            print(stats.to_json())
+    finally:
+        if saving:
+            m.save_field(args.field)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,450 @@
+import argparse
+import math
+import os
+import tempfile
+import time
+
+import bitboard
+import book
+import mnk
+import tictactoe as ttt
+
+# The list-based engine tictactoe.py had before it moved onto bitboards,
+# kept as a baseline to compare against
+
+LINES = (
+    [[(i, j) for j in range(3)] for i in range(3)]
+    + [[(i, j) for i in range(3)] for j in range(3)]
+    + [[(i, i) for i in range(3)], [(i, 2 - i) for i in range(3)]]
+)
+
+PRIORITY = {
+    (1, 1): 0,
+    (0, 0): 1, (0, 2): 1, (2, 0): 1, (2, 2): 1,
+    (0, 1): 2, (1, 0): 2, (1, 2): 2, (2, 1): 2,
+}
+
+
+def list_winner(board):
+    won = None
+    for (i1, j1), (i2, j2), (i3, j3) in LINES:
+        mark = board[i1][j1]
+        if mark is not None and mark == board[i2][j2] == board[i3][j3]:
+            if mark == ttt.X:
+                return ttt.X
+            won = ttt.O
+    return won
+
+
+def list_terminal(board):
+    return list_winner(board) is not None or all(
+        cell is not None for row in board for cell in row
+    )
+
+
+def list_utility(board):
+    won = list_winner(board)
+    return 1 if won == ttt.X else -1 if won == ttt.O else 0
+
+
+def list_player(board):
+    if list_terminal(board):
+        return None
+    marks = [cell for row in board for cell in row]
+    return ttt.O if marks.count(ttt.X) > marks.count(ttt.O) else ttt.X
+
+
+def list_actions(board):
+    if list_terminal(board):
+        return None
+    return {(i, j) for i in range(3) for j in range(3) if board[i][j] is None}
+
+
+def list_result(board, action):
+    if action not in list_actions(board):
+        raise Exception("Not valid move")
+    new_board = [list(row) for row in board]
+    new_board[action[0]][action[1]] = list_player(board)
+    return new_board
+
+
+def list_canonical(board):
+    cells = [cell or "." for row in board for cell in row]
+    return min("".join(cells[i] for i in symmetry)
+               for symmetry in bitboard.SYMMETRIES)
+
+
+def list_value(board, table, alpha=-math.inf, beta=math.inf):
+    key = list_canonical(board)
+    if key in table:
+        v, bound = table[key]
+        if (bound == bitboard.EXACT or (bound == bitboard.LOWER and v >= beta)
+                or (bound == bitboard.UPPER and v <= alpha)):
+            return v
+    if list_terminal(board):
+        table[key] = (list_utility(board), bitboard.EXACT)
+        return list_utility(board)
+
+    window = (alpha, beta)
+    maximizing = list_player(board) == ttt.X
+    best = -math.inf if maximizing else math.inf
+    for action in sorted(list_actions(board), key=lambda a: (PRIORITY[a], a)):
+        v = list_value(list_result(board, action), table, alpha, beta)
+        if maximizing:
+            best = max(best, v)
+            alpha = max(alpha, v)
+        else:
+            best = min(best, v)
+            beta = min(beta, v)
+        if alpha >= beta:
+            break
+
+    if best <= window[0]:
+        table[key] = (best, bitboard.UPPER)
+    elif best >= window[1]:
+        table[key] = (best, bitboard.LOWER)
+    else:
+        table[key] = (best, bitboard.EXACT)
+    return best
+
+
+def list_minimax(board, table):
+    """
+    Returns the move the list-based engine chooses, caching searched
+    positions in table.
+    """
+    if list_terminal(board):
+        return None
+    maximizing = list_player(board) == ttt.X
+    best = -math.inf if maximizing else math.inf
+    move = None
+    for action in list_actions(board):
+        if maximizing:
+            v = list_value(list_result(board, action), table, alpha=best)
+            if v > best:
+                best, move = v, action
+        else:
+            v = list_value(list_result(board, action), table, beta=best)
+            if v < best:
+                best, move = v, action
+        if best == (1 if maximizing else -1):
+            break
+    return move
+
+
+def plain_minimax(board):
+    """
+    The original minimax, without pruning or caching, kept as a baseline
+    to compare against. Returns (action, positions searched).
+    """
+    nodes = 0
+
+    def max_value(board):
+        nonlocal nodes
+        nodes += 1
+        if ttt.terminal(board):
+            return ttt.utility(board)
+        v = -math.inf
+        for action in ttt.actions(board):
+            v = max(v, min_value(ttt.result(board, action)))
+        return v
+
+    def min_value(board):
+        nonlocal nodes
+        nodes += 1
+        if ttt.terminal(board):
+            return ttt.utility(board)
+        v = math.inf
+        for action in ttt.actions(board):
+            v = min(v, max_value(ttt.result(board, action)))
+        return v
+
+    if ttt.terminal(board):
+        return None, nodes
+    if ttt.player(board) == ttt.X:
+        values = [(min_value(ttt.result(board, action)), action)
+                  for action in ttt.actions(board)]
+        best = max(v for v, _ in values)
+    else:
+        values = [(max_value(ttt.result(board, action)), action)
+                  for action in ttt.actions(board)]
+        best = min(v for v, _ in values)
+    for v, action in values:
+        if v == best:
+            return action, nodes
+
+
+def reachable():
+    """
+    Returns every position reachable from the initial state, as a
+    dictionary from a tuple of its cells to its value with perfect play.
+    """
+    values = {}
+
+    def search(board):
+        key = tuple(cell for row in board for cell in row)
+        if key not in values:
+            if ttt.terminal(board):
+                values[key] = ttt.utility(board)
+            else:
+                children = [search(ttt.result(board, action))
+                            for action in ttt.actions(board)]
+                if ttt.player(board) == ttt.X:
+                    values[key] = max(children)
+                else:
+                    values[key] = min(children)
+        return values[key]
+
+    search(ttt.initial_state())
+    return values
+
+
+def board_of(key):
+    return [list(key[0:3]), list(key[3:6]), list(key[6:9])]
+
+
+def expected_move(board, values):
+    """
+    Returns the move plain minimax makes: the first action with the best
+    value for the player to move.
+    """
+    children = [
+        (values[tuple(cell for row in ttt.result(board, action) for cell in row)],
+         action)
+        for action in ttt.actions(board)
+    ]
+    pick = max if ttt.player(board) == ttt.X else min
+    best = pick(v for v, _ in children)
+    for v, action in children:
+        if v == best:
+            return action
+
+
+def reset():
+    """Empties the search's caches and node counter."""
+    bitboard.transpositions.clear()
+    bitboard.killer_moves.clear()
+    bitboard.nodes = 0
+
+
+def check_parity(values, cold):
+    """
+    Checks that minimax chooses the same move as plain minimax on every
+    reachable position, searching each one with empty caches if cold.
+    Returns the number of positions checked, or raises an exception if
+    any move differs.
+    """
+    reset()
+    checked = 0
+    mismatches = 0
+    for key in values:
+        board = board_of(key)
+        if ttt.terminal(board):
+            continue
+        if cold:
+            reset()
+        expected = expected_move(board, values)
+        actual = ttt.minimax(board)
+        checked += 1
+        if actual != expected:
+            mismatches += 1
+            print(f"MISMATCH on {key}: expected {expected}, got {actual}")
+    if mismatches:
+        raise Exception(f"{mismatches} of {checked} moves differ from plain minimax")
+    return checked
+
+
+def per_call(function, calls, repeat=5):
+    """
+    Returns the best of `repeat` timings of function applied to every
+    argument tuple in calls, in microseconds per call.
+    """
+    best = math.inf
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for arguments in calls:
+            function(*arguments)
+        best = min(best, time.perf_counter() - start)
+    return best / len(calls) * 1e6
+
+
+def compare_representations(values):
+    """
+    Times winner, result and minimax on every reachable position with the
+    list-based engine, the bitboard engine, and the list adapter over it.
+    """
+    boards = [board_of(key) for key in values]
+    states = [ttt.encode(board) for board in boards]
+    moves = [(board, action) for board in boards
+             for action in list_actions(board) or ()]
+    state_moves = [(*ttt.encode(board), 3 * i + j) for board, (i, j) in moves]
+    open_boards = [board for board in boards if not list_terminal(board)]
+    open_states = [ttt.encode(board) for board in open_boards]
+
+    def cold_list_minimax(board):
+        list_minimax(board, {})
+
+    def cold_minimax(x, o):
+        reset()
+        bitboard.minimax(x, o)
+
+    def cold_adapter_minimax(board):
+        reset()
+        ttt.minimax(board)
+
+    rows = (
+        ("winner", [(board,) for board in boards], states,
+         list_winner, bitboard.winner, ttt.winner),
+        ("result", moves, state_moves,
+         list_result, bitboard.result, ttt.result),
+        ("minimax", [(board,) for board in open_boards], open_states,
+         cold_list_minimax, cold_minimax, cold_adapter_minimax),
+    )
+    print(f"{'':>10}{'list':>12}{'bitboard':>12}{'adapter':>12}  (us per call)")
+    for name, board_calls, state_calls, listed, bits, adapter in rows:
+        repeat = 1 if name == "minimax" else 5
+        print(f"{name:>10}"
+              f"{per_call(listed, board_calls, repeat):>12.2f}"
+              f"{per_call(bits, state_calls, repeat):>12.2f}"
+              f"{per_call(adapter, board_calls, repeat):>12.2f}")
+
+
+def check_mnk(values):
+    """
+    Checks that mnk's minimax, on a 3x3 board, chooses a move with the
+    best value on every reachable position. Returns the number checked,
+    or raises an exception if any move is not optimal.
+    """
+    checked = 0
+    mismatches = 0
+    for key, best in values.items():
+        board = board_of(key)
+        if ttt.terminal(board):
+            continue
+        move = mnk.minimax(board)
+        after = ttt.result(board, move)
+        checked += 1
+        if values[tuple(cell for row in after for cell in row)] != best:
+            mismatches += 1
+            print(f"MISMATCH on {key}: mnk chose {move}, which is not optimal")
+    if mismatches:
+        raise Exception(f"{mismatches} of {checked} mnk moves are not optimal")
+    return checked
+
+
+def play_mnk(size, k, budget, turns):
+    """
+    Plays turns moves of mnk against itself on a size x size board, with
+    budget seconds a move, printing how deep each search got.
+    """
+    board = mnk.initial_state(size, size)
+    for _ in range(turns):
+        if mnk.terminal(board, k):
+            break
+        search = mnk.Search(board, k)
+        start = time.perf_counter()
+        action = divmod(search.best_move(budget), size)
+        elapsed = time.perf_counter() - start
+        board = mnk.result(board, action)
+        print(f"  {size}x{size},{k}: {action} at depth {search.depth} after "
+              f"{search.nodes} positions in {elapsed:.3f}s")
+
+
+def check_book(values):
+    """
+    Builds the opening book into a temporary file, then checks minimax
+    looking moves up in it against plain minimax and times both ways of
+    choosing a move. Raises an exception if the book doesn't load back,
+    holds a wrong value, or gives a different move.
+    """
+    with tempfile.TemporaryDirectory() as temporary:
+        start = time.perf_counter()
+        path = book.write_book(os.path.join(temporary, book.BOOK_NAME))
+        elapsed = time.perf_counter() - start
+        size = os.path.getsize(path)
+        table = book.load_book(path)
+    print(f"    book: built in {elapsed:.3f}s, {size} bytes")
+    if table is None:
+        raise Exception("the book just written fails to load")
+    for key, best in values.items():
+        entry = book.lookup(table, *ttt.encode(board_of(key)))
+        if entry is None or entry[1] != best:
+            raise Exception(f"the book holds {entry} for {key}, whose value is {best}")
+    if sum(entry != book.UNREACHABLE for entry in table) != len(values):
+        raise Exception("the book holds positions that can't be reached")
+
+    boards = [(board_of(key),) for key in values if not ttt.terminal(board_of(key))]
+
+    def cold_minimax(board):
+        reset()
+        ttt.minimax(board)
+
+    ttt.opening_book = None
+    searched = per_call(cold_minimax, boards, repeat=1)
+    ttt.opening_book = table
+    looked_up = per_call(ttt.minimax, boards)
+    checked = check_parity(values, cold=True)
+    print(f"    book: {checked} positions checked, {looked_up:.2f} us a move "
+          f"looked up, {searched:.2f} us searched")
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Benchmark and check tictactoe's minimax search."
+    )
+    parser.add_argument("--skip-baseline", action="store_true",
+                        help="don't time plain minimax from the empty board")
+    parser.add_argument("--budget", type=float, default=1.0,
+                        help="seconds mnk may search each move on a 15x15 board")
+    args = parser.parse_args()
+    board = ttt.initial_state()
+
+    # Time and check the search itself, even if a book has been built
+    ttt.opening_book = None
+
+    # Before: every branch of the whole game tree
+    if not args.skip_baseline:
+        start = time.perf_counter()
+        move, nodes = plain_minimax(board)
+        elapsed = time.perf_counter() - start
+        print(f"   plain: {move} after {nodes} positions in {elapsed:.3f}s")
+
+    # After: alpha-beta with move ordering and a transposition table
+    reset()
+    start = time.perf_counter()
+    move = ttt.minimax(board)
+    elapsed = time.perf_counter() - start
+    print(f"   alpha: {move} after {bitboard.nodes} positions in {elapsed:.3f}s")
+
+    bitboard.nodes = 0
+    start = time.perf_counter()
+    move = ttt.minimax(board)
+    elapsed = time.perf_counter() - start
+    print(f"    warm: {move} after {bitboard.nodes} positions in {elapsed:.3f}s")
+
+    # Both must choose the same moves everywhere, whether or not earlier
+    # searches have filled the caches
+    values = reachable()
+    compare_representations(values)
+    for cold in (True, False):
+        start = time.perf_counter()
+        checked = check_parity(values, cold)
+        elapsed = time.perf_counter() - start
+        print(f"  parity: {checked} positions {'cold' if cold else 'warm'} "
+              f"in {elapsed:.3f}s")
+
+    # Looking moves up must give the same ones again
+    check_book(values)
+    ttt.opening_book = None
+
+    # The general engine must also play perfectly on a 3x3 board, and
+    # still reach some depth on a gomoku-sized one
+    start = time.perf_counter()
+    checked = check_mnk(values)
+    elapsed = time.perf_counter() - start
+    print(f"     mnk: {checked} positions optimal in {elapsed:.3f}s")
+    play_mnk(15, 5, args.budget, 6)
+
+
+if __name__ == "__main__":
+    main()
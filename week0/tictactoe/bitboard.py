@@ -0,0 +1,239 @@
+"""
+Tic Tac Toe on bitboards
+
+A state is two 9-bit integers (x, o), the cells holding X and those
+holding O, where cell (i, j) is bit 3 * i + j.
+"""
+import math
+
+X = "X"
+O = "O"
+
+# Every cell
+FULL = 0b111111111
+
+# The 8 lines of three cells that win the game: rows, columns, diagonals
+LINE_MASKS = (
+    0b000000111, 0b000111000, 0b111000000,
+    0b001001001, 0b010010010, 0b100100100,
+    0b100010001, 0b001010100,
+)
+
+# Whether each set of cells contains a whole line
+WINNING = bytes(
+    any(mask & line == line for line in LINE_MASKS) for mask in range(FULL + 1)
+)
+
+# The 8 rotations and reflections of the board, each as the cell that
+# moves to cell 0, 1, ... 8
+SYMMETRIES = (
+    (0, 1, 2, 3, 4, 5, 6, 7, 8),
+    (6, 3, 0, 7, 4, 1, 8, 5, 2),
+    (8, 7, 6, 5, 4, 3, 2, 1, 0),
+    (2, 5, 8, 1, 4, 7, 0, 3, 6),
+    (2, 1, 0, 5, 4, 3, 8, 7, 6),
+    (0, 3, 6, 1, 4, 7, 2, 5, 8),
+    (6, 7, 8, 3, 4, 5, 0, 1, 2),
+    (8, 5, 2, 7, 4, 1, 6, 3, 0),
+)
+
+# Each set of cells under each symmetry, looked up rather than permuting
+# bits one at a time
+TRANSFORMS = tuple(
+    tuple(
+        sum(1 << k for k, cell in enumerate(symmetry) if mask >> cell & 1)
+        for mask in range(FULL + 1)
+    )
+    for symmetry in SYMMETRIES
+)
+
+# How early to search a move in each cell: the center, then corners, then
+# edges
+PRIORITY = (1, 2, 1, 2, 0, 2, 1, 2, 1)
+
+# Kinds of value the transposition table holds: exactly a position's
+# value, or only a lower or upper bound on it
+EXACT = "exact"
+LOWER = "lower"
+UPPER = "upper"
+
+# (value, kind of value) of the positions searched so far, by canonical
+# encoding
+transpositions = {}
+
+# Up to two recent moves, by depth, that made a search stop early
+killer_moves = {}
+
+# Number of positions value() has been asked about, to measure searches
+nodes = 0
+
+
+def winner(x, o):
+    """
+    Returns the winner of the game, if there is one.
+    """
+    if WINNING[x]:
+        return X
+    if WINNING[o]:
+        return O
+    return None
+
+
+def terminal(x, o):
+    """
+    Returns True if game is over, False otherwise.
+    """
+    return bool(WINNING[x] or WINNING[o]) or x | o == FULL
+
+
+def utility(x, o):
+    """
+    Returns 1 if X has won the game, -1 if O has won, 0 otherwise.
+    """
+    if WINNING[x]:
+        return 1
+    if WINNING[o]:
+        return -1
+    return 0
+
+
+def player(x, o):
+    """
+    Returns player who has the next turn, or None if the game is over.
+    """
+    if terminal(x, o):
+        return None
+    return O if x.bit_count() > o.bit_count() else X
+
+
+def actions(x, o):
+    """
+    Returns the free cells, in order, or an empty list if the game is over.
+    """
+    if terminal(x, o):
+        return []
+    free = FULL & ~(x | o)
+    return [cell for cell in range(9) if free >> cell & 1]
+
+
+def result(x, o, cell):
+    """
+    Returns the state that results from the player to move taking cell.
+    """
+    bit = 1 << cell
+    if terminal(x, o) or (x | o) & bit:
+        raise Exception("Not valid move")
+    if x.bit_count() > o.bit_count():
+        return x, o | bit
+    return x | bit, o
+
+
+def canonical(x, o):
+    """
+    Returns an integer encoding of the state that is the same for all 8
+    states it can be rotated or reflected into.
+    """
+    return min(transform[x] << 9 | transform[o] for transform in TRANSFORMS)
+
+
+def ordered_actions(x, o, depth):
+    """
+    Returns the free cells in the order to search them: the center, then
+    corners, then edges, and within each of those any killer move for
+    this depth first.
+    """
+    killers = killer_moves.get(depth, ())
+    return sorted(
+        actions(x, o),
+        key=lambda cell: (PRIORITY[cell], cell not in killers, cell)
+    )
+
+
+def value(x, o, alpha=-math.inf, beta=math.inf, depth=0):
+    """
+    Returns the minimax value of the state: 1 if X wins with best play,
+    -1 if O wins, 0 if it is a draw.
+
+    Searches with alpha-beta pruning, so a value at or below alpha is
+    only an upper bound on the true value, and one at or above beta only
+    a lower bound. Results are cached in the transposition table under
+    the state's canonical encoding, with which kind of result each is.
+    """
+    global nodes
+    nodes += 1
+
+    if WINNING[x]:
+        return 1
+    if WINNING[o]:
+        return -1
+    if x | o == FULL:
+        return 0
+
+    key = canonical(x, o)
+    if key in transpositions:
+        v, bound = transpositions[key]
+        if (bound == EXACT or (bound == LOWER and v >= beta)
+                or (bound == UPPER and v <= alpha)):
+            return v
+
+    window = (alpha, beta)
+    maximizing = x.bit_count() <= o.bit_count()
+    best = -math.inf if maximizing else math.inf
+    for cell in ordered_actions(x, o, depth):
+        bit = 1 << cell
+        if maximizing:
+            v = value(x | bit, o, alpha, beta, depth + 1)
+            best = max(best, v)
+            alpha = max(alpha, v)
+        else:
+            v = value(x, o | bit, alpha, beta, depth + 1)
+            best = min(best, v)
+            beta = min(beta, v)
+
+        # The opponent will never allow this position, so stop searching
+        # it and remember the move that showed that
+        if alpha >= beta:
+            killers = killer_moves.setdefault(depth, [])
+            if cell not in killers:
+                killers.insert(0, cell)
+                del killers[2:]
+            break
+
+    if best <= window[0]:
+        transpositions[key] = (best, UPPER)
+    elif best >= window[1]:
+        transpositions[key] = (best, LOWER)
+    else:
+        transpositions[key] = (best, EXACT)
+    return best
+
+
+def minimax(x, o, cells=None):
+    """
+    Returns the optimal cell for the player to move to take, or None if
+    the game is over.
+
+    Of the cells with the best value, returns the first in `cells` (by
+    default, the free cells in order); each later one is only searched
+    for whether it is strictly better.
+    """
+    if terminal(x, o):
+        return None
+    if cells is None:
+        cells = actions(x, o)
+
+    maximizing = x.bit_count() <= o.bit_count()
+    best = -math.inf if maximizing else math.inf
+    move = None
+    for cell in cells:
+        if maximizing:
+            v = value(*result(x, o, cell), alpha=best, depth=1)
+            if v > best:
+                best, move = v, cell
+        else:
+            v = value(*result(x, o, cell), beta=best, depth=1)
+            if v < best:
+                best, move = v, cell
+        if best == (1 if maximizing else -1):
+            break
+    return move
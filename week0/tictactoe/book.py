@@ -0,0 +1,145 @@
+"""
+Perfect-play opening book for tictactoe
+
+The book is a file holding one byte for every board, indexed by the
+board's base 3 encoding: the sum over cells of 3 ** (3 * i + j) times 0
+for an empty cell, 1 for X or 2 for O. Each byte of a reachable board
+holds the optimal cell to take in its low four bits and the board's value
+plus one above them.
+"""
+import argparse
+import os
+import struct
+import time
+import zlib
+
+import bitboard
+
+BOOK_NAME = "tictactoe.book"
+MAGIC = b"TTTBOOK\0"
+VERSION = 1
+
+# Magic, version, then the CRC-32 of the entries that follow
+HEADER = struct.Struct("=8sII")
+
+# Number of boards, reachable or not
+SIZE = 3 ** 9
+
+# Entries of boards that can't be reached in a game, and the cell stored
+# for boards where the game is over
+UNREACHABLE = 0xFF
+NO_MOVE = 0xF
+
+# The base 3 encoding of each set of cells holding one mark
+TERNARY = tuple(
+    sum(3 ** cell for cell in range(9) if mask >> cell & 1)
+    for mask in range(bitboard.FULL + 1)
+)
+
+
+def book_path():
+    return os.path.join(os.path.dirname(os.path.abspath(__file__)), BOOK_NAME)
+
+
+def index(x, o):
+    """Returns the base 3 encoding of the (x, o) bitboards."""
+    return TERNARY[x] + 2 * TERNARY[o]
+
+
+def entries():
+    """
+    Returns the book's entries, searching every board reachable from the
+    initial state once.
+    """
+    # Imported here so that tictactoe can import this module
+    import tictactoe
+
+    table = bytearray([UNREACHABLE]) * SIZE
+    stack = [(0, 0)]
+    while stack:
+        x, o = stack.pop()
+        i = index(x, o)
+        if table[i] != UNREACHABLE:
+            continue
+        v = bitboard.value(x, o)
+        if bitboard.terminal(x, o):
+            cell = NO_MOVE
+        else:
+            # Search rather than look up, with ties broken as without a book
+            cell = bitboard.minimax(x, o, [
+                3 * a + b for a, b in tictactoe.actions(tictactoe.decode(x, o))
+            ])
+            for move in bitboard.actions(x, o):
+                stack.append(bitboard.result(x, o, move))
+        table[i] = (v + 1) << 4 | cell
+    return bytes(table)
+
+
+def write_book(path=None):
+    """
+    Builds the book and writes it to path (by default, next to this
+    module), returning the path.
+    """
+    path = path or book_path()
+    table = entries()
+    temporary = path + ".tmp"
+    with open(temporary, "wb") as f:
+        f.write(HEADER.pack(MAGIC, VERSION, zlib.crc32(table)))
+        f.write(table)
+    os.replace(temporary, path)
+    return path
+
+
+def load_book(path=None):
+    """
+    Returns the book's entries from path (by default, next to this
+    module).
+
+    Returns None if there is no book, or if it was written by another
+    version, is the wrong size, or fails its checksum.
+    """
+    try:
+        with open(path or book_path(), "rb") as f:
+            data = f.read()
+    except FileNotFoundError:
+        return None
+    if len(data) != HEADER.size + SIZE:
+        return None
+    magic, version, checksum = HEADER.unpack_from(data)
+    table = data[HEADER.size:]
+    if magic != MAGIC or version != VERSION or zlib.crc32(table) != checksum:
+        return None
+    return table
+
+
+def lookup(table, x, o):
+    """
+    Returns (optimal cell or None if the game is over, value) for the
+    (x, o) bitboards, or None if the board can't be reached in a game.
+    """
+    entry = table[TERNARY[x] + 2 * TERNARY[o]]
+    if entry == UNREACHABLE:
+        return None
+    cell = entry & 0xF
+    return (None if cell == NO_MOVE else cell), (entry >> 4) - 1
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Build tictactoe's opening book."
+    )
+    parser.add_argument("-o", "--output",
+                        help=f"where to write the book (default: {BOOK_NAME} "
+                             "next to tictactoe.py)")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    path = write_book(args.output)
+    elapsed = time.perf_counter() - start
+    table = load_book(path)
+    reachable = sum(entry != UNREACHABLE for entry in table)
+    print(f"Wrote {reachable} positions to {path} in {elapsed:.3f}s.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,358 @@
+"""
+Tic Tac Toe on an m x n board, won by k in a row
+
+With the defaults, a 3x3 board won by 3 in a row, initial_state, result
+and minimax can stand in for tictactoe's.
+"""
+import math
+import random
+import time
+
+from bitboard import EXACT, LOWER, UPPER
+
+X = "X"
+O = "O"
+EMPTY = None
+
+# The four directions a line can run in: across, down, and both diagonals
+DIRECTIONS = ((0, 1), (1, 0), (1, 1), (1, -1))
+
+# How far from the nearest mark a move may be to be searched. Every cell
+# of a 3x3 board is within this of every other, so there the search is
+# still over every move.
+REACH = 2
+
+
+def initial_state(height=3, width=3):
+    """
+    Returns starting state of a board with height rows and width columns.
+    """
+    return [[EMPTY] * width for _ in range(height)]
+
+
+def player(board):
+    """
+    Returns player who has the next turn on a board.
+    """
+    marks = [cell for row in board for cell in row]
+    return O if marks.count(X) > marks.count(O) else X
+
+
+def windows(height, width, k):
+    """
+    Returns every run of k cells in a line on the board, each as a tuple
+    of cell indexes, where cell (i, j) is i * width + j.
+    """
+    result = []
+    for i in range(height):
+        for j in range(width):
+            for di, dj in DIRECTIONS:
+                last_i, last_j = i + di * (k - 1), j + dj * (k - 1)
+                if 0 <= last_i < height and 0 <= last_j < width:
+                    result.append(tuple(
+                        (i + di * step) * width + j + dj * step for step in range(k)
+                    ))
+    return result
+
+
+def winner(board, k=3):
+    """
+    Returns the winner of the game, if there is one. If both players have
+    k in a row, X takes precedence, as in tictactoe.
+    """
+    cells = [cell for row in board for cell in row]
+    won = None
+    for window in windows(len(board), len(board[0]), k):
+        mark = cells[window[0]]
+        if mark is not None and all(cells[cell] == mark for cell in window):
+            if mark == X:
+                return X
+            won = O
+    return won
+
+
+def terminal(board, k=3):
+    """
+    Returns True if game is over, False otherwise.
+    """
+    return winner(board, k) is not None or all(
+        cell is not None for row in board for cell in row
+    )
+
+
+def utility(board, k=3):
+    """
+    Returns 1 if X has won the game, -1 if O has won, 0 otherwise.
+    """
+    won = winner(board, k)
+    return 1 if won == X else -1 if won == O else 0
+
+
+def actions(board, k=3):
+    """
+    Returns set of all possible actions (i, j) available on the board, or
+    None if the game is over.
+    """
+    if terminal(board, k):
+        return None
+    return {(i, j) for i, row in enumerate(board)
+            for j, cell in enumerate(row) if cell is None}
+
+
+def result(board, action):
+    """
+    Returns the board that results from making move (i, j) on the board.
+    """
+    i, j = action
+    if not (0 <= i < len(board) and 0 <= j < len(board[0])) or board[i][j] is not None:
+        raise Exception("Not valid move")
+    new_board = [list(row) for row in board]
+    new_board[i][j] = player(board)
+    return new_board
+
+
+class OutOfTime(Exception):
+    pass
+
+
+class Search():
+    """
+    Iterative-deepening alpha-beta search from one position.
+
+    The board is kept as a flat list of cells that moves are made on and
+    taken back. For every run of k cells, the search counts how many of
+    each player's marks it holds, updating only the runs through the cell
+    a move is made on. A run reaching k means that move won; the runs
+    still open to only one player give the heuristic value of positions
+    at the depth cutoff.
+    """
+
+    def __init__(self, board, k):
+        self.height = len(board)
+        self.width = len(board[0])
+        self.k = k
+        size = self.height * self.width
+        self.cells = [cell for row in board for cell in row]
+
+        # Runs of k cells, and for each cell the runs through it
+        self.windows = windows(self.height, self.width, k)
+        self.through = [[] for _ in range(size)]
+        for w, window in enumerate(self.windows):
+            for cell in window:
+                self.through[cell].append(w)
+
+        # Cells within REACH of each cell
+        self.nearby = []
+        for cell in range(size):
+            i, j = divmod(cell, self.width)
+            self.nearby.append([
+                r * self.width + c
+                for r in range(max(0, i - REACH), min(self.height, i + REACH + 1))
+                for c in range(max(0, j - REACH), min(self.width, j + REACH + 1))
+            ])
+
+        # A run with n of one player's marks and none of the other's is
+        # worth weights[n] to that player; any win outscores all of them
+        self.weights = [0] + [4 ** n for n in range(1, k + 1)]
+        self.win = 4 ** (k + 1) * (len(self.windows) + 1)
+
+        # Random keys for each mark in each cell, XORed together into a
+        # hash of the position
+        rng = random.Random(0)
+        self.keys = {mark: [rng.getrandbits(64) for _ in range(size)]
+                     for mark in (X, O)}
+
+        self.counts = {X: [0] * len(self.windows), O: [0] * len(self.windows)}
+        self.near = [0] * size
+        self.score = 0
+        self.hash = 0
+        self.empty = size
+        self.transpositions = {}
+        self.nodes = 0
+        self.depth = 0
+        self.deadline = None
+        for cell, mark in enumerate(self.cells):
+            if mark is not None:
+                self.cells[cell] = None
+                self.place(cell, mark)
+
+    def contribution(self, w):
+        """Returns the heuristic value of run w to X."""
+        x, o = self.counts[X][w], self.counts[O][w]
+        if o == 0:
+            return self.weights[x]
+        if x == 0:
+            return -self.weights[o]
+        return 0
+
+    def place(self, cell, mark):
+        """
+        Puts mark in cell, returning True if that makes k in a row.
+        """
+        won = False
+        counts = self.counts[mark]
+        for w in self.through[cell]:
+            self.score -= self.contribution(w)
+            counts[w] += 1
+            self.score += self.contribution(w)
+            if counts[w] == self.k:
+                won = True
+        for other in self.nearby[cell]:
+            self.near[other] += 1
+        self.cells[cell] = mark
+        self.hash ^= self.keys[mark][cell]
+        self.empty -= 1
+        return won
+
+    def remove(self, cell, mark):
+        """Takes mark back out of cell."""
+        counts = self.counts[mark]
+        for w in self.through[cell]:
+            self.score -= self.contribution(w)
+            counts[w] -= 1
+            self.score += self.contribution(w)
+        for other in self.nearby[cell]:
+            self.near[other] -= 1
+        self.cells[cell] = None
+        self.hash ^= self.keys[mark][cell]
+        self.empty += 1
+
+    def urgency(self, cell):
+        """
+        Returns how much the runs through cell are worth to either player,
+        to search the moves that make or block the most threats first.
+        """
+        total = 0
+        for w in self.through[cell]:
+            x, o = self.counts[X][w], self.counts[O][w]
+            if o == 0:
+                total += self.weights[x + 1]
+            if x == 0:
+                total += self.weights[o + 1]
+        return total
+
+    def moves(self, first=None):
+        """
+        Returns the empty cells near a mark, or the center of an empty
+        board, most urgent first, with first ahead of them all if given.
+        """
+        if self.empty == len(self.cells):
+            return [self.height // 2 * self.width + self.width // 2]
+        cells = [cell for cell, mark in enumerate(self.cells)
+                 if mark is None and self.near[cell]]
+        cells.sort(key=self.urgency, reverse=True)
+        if first is not None and first in cells:
+            cells.remove(first)
+            cells.insert(0, first)
+        return cells
+
+    def value(self, mark, depth, alpha, beta):
+        """
+        Returns the value of the position to mark, the player to move,
+        searching depth moves ahead before falling back on the heuristic.
+        """
+        self.nodes += 1
+        if (self.deadline is not None and self.nodes % 128 == 0
+                and time.perf_counter() > self.deadline):
+            raise OutOfTime()
+
+        if self.empty == 0:
+            return 0
+        if depth == 0:
+            return self.score if mark == X else -self.score
+
+        entry = self.transpositions.get(self.hash)
+        best_move = None
+        if entry is not None:
+            entry_depth, v, bound, best_move = entry
+            if entry_depth >= depth and (
+                    bound == EXACT or (bound == LOWER and v >= beta)
+                    or (bound == UPPER and v <= alpha)):
+                return v
+
+        window = (alpha, beta)
+        other = O if mark == X else X
+        best = -math.inf
+        for cell in self.moves(best_move):
+            if self.place(cell, mark):
+                # Sooner wins leave more cells empty and are worth more
+                v = self.win + self.empty
+            else:
+                v = -self.value(other, depth - 1, -beta, -alpha)
+            self.remove(cell, mark)
+            if v > best:
+                best, best_move = v, cell
+            alpha = max(alpha, v)
+            if alpha >= beta:
+                break
+
+        if best <= window[0]:
+            bound = UPPER
+        elif best >= window[1]:
+            bound = LOWER
+        else:
+            bound = EXACT
+        self.transpositions[self.hash] = (depth, best, bound, best_move)
+        return best
+
+    def root(self, mark, depth, first):
+        """
+        Returns (value, cell) of the best move for mark, searching depth
+        moves ahead and trying first before the others.
+        """
+        other = O if mark == X else X
+        alpha = -math.inf
+        move = None
+        for cell in self.moves(first):
+            if self.place(cell, mark):
+                v = self.win + self.empty
+            else:
+                v = -self.value(other, depth - 1, -math.inf, -alpha)
+            self.remove(cell, mark)
+            if v > alpha:
+                alpha, move = v, cell
+        return alpha, move
+
+    def best_move(self, budget=None, max_depth=None):
+        """
+        Returns the best cell for the player to move, searching one move
+        deeper at a time until the game's end, max_depth, or until budget
+        seconds have passed. The last search to finish decides the move;
+        the first one always finishes.
+        """
+        mark = O if self.cells.count(X) > self.cells.count(O) else X
+        limit = self.empty if max_depth is None else min(max_depth, self.empty)
+        start = time.perf_counter()
+        moves = self.moves()
+        if len(moves) == 1:
+            return moves[0]
+        move = None
+        for depth in range(1, limit + 1):
+            try:
+                v, move = self.root(mark, depth, move)
+            except OutOfTime:
+                break
+            self.depth = depth
+            if budget is not None:
+                self.deadline = start + budget
+
+            # A forced win or loss will not change with a deeper search
+            if abs(v) >= self.win:
+                break
+        return move
+
+
+def minimax(board, k=3, budget=1.0, max_depth=None):
+    """
+    Returns the optimal action for the current player on the board, or
+    None if the game is over.
+
+    Searches with iterative-deepening alpha-beta for up to budget seconds
+    (or without limit if budget is None). Small boards are searched to the
+    end of the game, so the move is optimal; on larger ones, positions at
+    the deepest depth reached are valued by a heuristic.
+    """
+    if terminal(board, k):
+        return None
+    search = Search(board, k)
+    return divmod(search.best_move(budget, max_depth), search.width)
@@ -0,0 +1,132 @@
+import argparse
+import multiprocessing
+import os
+import random
+import statistics
+import time
+
+import mnk
+import tictactoe as ttt
+
+
+def search_move(board, rng):
+    """Searches for the optimal move, ignoring any opening book."""
+    return ttt.search(board)
+
+
+def book_move(board, rng):
+    """Looks the optimal move up in the opening book."""
+    return ttt.minimax(board)
+
+
+def mnk_move(board, rng):
+    """Chooses a move with the general m,n,k engine."""
+    return mnk.minimax(board)
+
+
+def random_move(board, rng):
+    """Chooses any free cell at random."""
+    return rng.choice(sorted(ttt.actions(board)))
+
+
+# Ways of choosing a move, by name, each called with a board and a
+# random.Random to draw from
+POLICIES = {
+    "minimax": search_move,
+    "book": book_move,
+    "mnk": mnk_move,
+    "random": random_move,
+}
+
+
+def play(game):
+    """
+    Plays one game, given as (X's policy, O's policy, seed), returning
+    (winner or None, seconds each of X's moves took, seconds each of O's
+    moves took).
+    """
+    x_policy, o_policy, seed = game
+    rng = random.Random(seed)
+    policies = {ttt.X: POLICIES[x_policy], ttt.O: POLICIES[o_policy]}
+    latencies = {ttt.X: [], ttt.O: []}
+    board = ttt.initial_state()
+    while not ttt.terminal(board):
+        mark = ttt.player(board)
+        start = time.perf_counter()
+        action = policies[mark](board, rng)
+        latencies[mark].append(time.perf_counter() - start)
+        board = ttt.result(board, action)
+    return ttt.winner(board), latencies[ttt.X], latencies[ttt.O]
+
+
+def simulate(x_policy, o_policy, games, workers, seed=0):
+    """
+    Plays games games of x_policy against o_policy across a pool of
+    worker processes, returning the result of play() for each, in order.
+
+    Workers are forked after the opening book is loaded, so they share it
+    rather than each reading their own copy.
+    """
+    jobs = [(x_policy, o_policy, seed + i) for i in range(games)]
+    context = multiprocessing.get_context("fork")
+    with context.Pool(workers) as pool:
+        chunksize = max(1, games // (16 * workers))
+        return pool.map(play, jobs, chunksize=chunksize)
+
+
+def percentiles(latencies):
+    """
+    Returns the p50, p90, p99 and max of a list of latencies in seconds,
+    in milliseconds.
+    """
+    if len(latencies) < 2:
+        points = latencies * 99 or [0.0] * 99
+    else:
+        points = statistics.quantiles(latencies, n=100, method="inclusive")
+    return points[49] * 1000, points[89] * 1000, points[98] * 1000, \
+        max(latencies, default=0.0) * 1000
+
+
+def report(x_policy, o_policy, results, elapsed):
+    games = len(results)
+    outcomes = [won for won, _, _ in results]
+    print(f"{x_policy} (X) against {o_policy} (O), {games} games")
+    for label, outcome in (("X wins", ttt.X), ("O wins", ttt.O), ("draws", None)):
+        count = outcomes.count(outcome)
+        print(f"{label:>10}: {count:>8} ({count / games:6.1%})")
+
+    moves = 0
+    for mark, policy, column in ((ttt.X, x_policy, 1), (ttt.O, o_policy, 2)):
+        latencies = [latency for result in results for latency in result[column]]
+        moves += len(latencies)
+        p50, p90, p99, most = percentiles(latencies)
+        print(f"{mark} latency: p50 {p50:.3f} p90 {p90:.3f} p99 {p99:.3f} "
+              f"max {most:.3f} ms over {len(latencies)} moves ({policy})")
+    print(f"throughput: {games / elapsed:.1f} games/s, "
+          f"{moves / elapsed:.1f} moves/s in {elapsed:.3f}s")
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Play tictactoe policies against each other without a display."
+    )
+    parser.add_argument("x", choices=POLICIES, help="policy that plays X")
+    parser.add_argument("o", choices=POLICIES, help="policy that plays O")
+    parser.add_argument("-n", "--games", type=int, default=1000)
+    parser.add_argument("-j", "--workers", type=int, default=os.cpu_count(),
+                        help="number of worker processes")
+    parser.add_argument("--seed", type=int, default=0,
+                        help="seed of the first game; each later one adds 1")
+    args = parser.parse_args()
+
+    if "book" in (args.x, args.o) and ttt.opening_book is None:
+        parser.error("no opening book; build one with book.py")
+
+    start = time.perf_counter()
+    results = simulate(args.x, args.o, args.games, args.workers, args.seed)
+    elapsed = time.perf_counter() - start
+    report(args.x, args.o, results, elapsed)
+
+
+if __name__ == "__main__":
+    main()
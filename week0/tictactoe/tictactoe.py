@@ -1,13 +1,17 @@
 """
 Tic Tac Toe Player
 """
-import copy
-import math
+import bitboard
+import book
 
-X = "X"
-O = "O"
+X = bitboard.X
+O = bitboard.O
 EMPTY = None
 
+# Optimal moves for every reachable board, if the book has been built
+# with book.py and is intact
+opening_book = book.load_book()
+
 
 def initial_state():
     """
@@ -18,189 +22,122 @@ def initial_state():
             [EMPTY, EMPTY, EMPTY]]
 
 
+# For each row of the board, the bits its three cells set in X's
+# bitboard plus 512 times those they set in O's, by the row's cells
+ROW_BITS = tuple(
+    {
+        (a, b, c): sum(1 << (3 * i + k) << (9 if cell == O else 0)
+                       for k, cell in enumerate((a, b, c)) if cell is not EMPTY)
+        for a in (EMPTY, X, O) for b in (EMPTY, X, O) for c in (EMPTY, X, O)
+    }
+    for i in range(3)
+)
+
+# The (x, o) bitboards of every board, by its nine cells in order, so
+# that encoding one is a single lookup
+ENCODING = {
+    top + middle + bottom: ((top_bits | middle_bits | bottom_bits) & 511,
+                            (top_bits | middle_bits | bottom_bits) >> 9)
+    for top, top_bits in ROW_BITS[0].items()
+    for middle, middle_bits in ROW_BITS[1].items()
+    for bottom, bottom_bits in ROW_BITS[2].items()
+}
+
+# The cells of a row by its bits in X's bitboard plus eight times its
+# bits in O's
+ROW_CELLS = [EMPTY] * 64
+for row, bits in ROW_BITS[0].items():
+    ROW_CELLS[bits & 7 | bits >> 6] = row
+
+
+def encode(board):
+    """
+    Returns the (x, o) bitboards of a board.
+    """
+    top, middle, bottom = board
+    return ENCODING[(*top, *middle, *bottom)]
+
+
+def decode(x, o):
+    """
+    Returns the board of (x, o) bitboards.
+    """
+    return [list(ROW_CELLS[x & 7 | o << 3 & 56]),
+            list(ROW_CELLS[x >> 3 & 7 | o & 56]),
+            list(ROW_CELLS[x >> 6 & 7 | o >> 3 & 56])]
+
+
 def player(board):
     """
     Returns player who has the next turn on a board.
     """
-    initial_board = initial_state()
-    if board == initial_board:
-        return X
-    elif terminal(board):
-        return None
-    else:
-        number_x = 0
-        number_o = 0
-        for row in board:
-            for point in row:
-                if point == X:
-                    number_x +=1
-                elif point == O:
-                    number_o +=1
-        if number_x > number_o:
-            return O
-        else:
-            return X
+    return bitboard.player(*encode(board))
+
 
 def actions(board):
     """
     Returns set of all possible actions (i, j) available on the board.
     """
-    if terminal(board):
+    x, o = encode(board)
+    if bitboard.terminal(x, o):
         return None
-    else:
-        actions = set()
-        for i in range(len(board)):
-            for j in range(len(board)):
-                if board[i][j] == EMPTY:
-                    actions.add((i,j))
-        return actions
+    return {divmod(cell, 3) for cell in bitboard.actions(x, o)}
+
 
 def result(board, action):
     """
     Returns the board that results from making move (i, j) on the board.
     """
-    deep_copy = copy.deepcopy(board)
-    if action not in actions(board):
+    i, j = action
+    if not (0 <= i < 3 and 0 <= j < 3):
         raise Exception("Not valid move")
-    else:
-        if player(board) == X:
-            deep_copy[action[0]][action[1]] = X
-        elif player(board) == O:
-            deep_copy[action[0]][action[1]] = O
-        return deep_copy 
+
+    # bitboard.result rejects taken cells and finished games
+    return decode(*bitboard.result(*encode(board), 3 * i + j))
+
 
 def winner(board):
     """
     Returns the winner of the game, if there is one.
     """
-    def check_row(board1,player1):
-        for i in range(len(board1)):
-            count =0
-            for j in range(len(board1)):
-                if board1[i][j] == player1:
-                    count +=1
-            if count ==3:
-                return True
-        return False
-    
-    def check_column(board1, player1):
-        for i in range(len(board1)):
-            count =0
-            for j in range(len(board1)):
-                if board1[j][i] == player1:
-                    count +=1
-            if count ==3:
-                return True
-        return False    
-
-    def check_dialouge(board1,player1):
-        count = 0
-        for i in range(len(board1)):
-            if board1[i][i] == player1:
-                count +=1
-        if count == 3:
-            return True
-        return False
-
-    def check_dialouge_reverse(board1,player1):
-        count = 0 
-        for i in range(len(board1)-1,-1,-1):
-            if board1[i][len(board1)-1-i] == player1:
-                count +=1
-        if count == 3:
-            return True
-        return False
-
-
-    if check_row(board,X) or check_column(board,X) or check_dialouge(board,X) or check_dialouge_reverse(board,X):
-        return X
-
-    elif check_row(board,O) or check_column(board,O) or check_dialouge(board,O) or check_dialouge_reverse(board,O):
-        return O
-    else:
-        return None
+    return bitboard.winner(*encode(board))
 
-    
 
 def terminal(board):
     """
     Returns True if game is over, False otherwise.
     """
-    if winner(board) == X or winner(board) == O:
-        return True
-    else:
-        for i in range(len(board)):
-            for j in range(len(board)):
-                if board[i][j] == EMPTY:
-                    return False
-        return True 
+    return bitboard.terminal(*encode(board))
+
 
 def utility(board):
     """
     Returns 1 if X has won the game, -1 if O has won, 0 otherwise.
     """
-    if winner(board) == X:
-        return 1
-    elif winner(board) == O:
-        return -1
-    else:
-        return 0
+    return bitboard.utility(*encode(board))
+
 
 def minimax(board):
     """
     Returns the optimal action for the current player on the board.
     """
-    # minimax function with max value
-    def minimax_max_value(board):
-        v = -math.inf
-        if terminal(board):
-            return utility(board)
-        for action in actions(board):
-            v = max(v, minimax_min_value(result(board,action)))
-        return v
-
-    # minimax function with min value
-    def minimax_min_value(board):
-        v = math.inf
-        if terminal(board):
-            return utility(board)
-        for action in actions(board):
-            v = min(v, minimax_max_value(result(board,action)))
-        return v
-
+    if opening_book is not None:
+        entry = book.lookup(opening_book, *encode(board))
+        if entry is not None:
+            cell = entry[0]
+            return None if cell is None else divmod(cell, 3)
+    return search(board)
 
 
-    if terminal(board):
+def search(board):
+    """
+    Returns the optimal action for the current player on the board,
+    searching for it even if there is an opening book.
+    """
+    x, o = encode(board)
+    if bitboard.terminal(x, o):
         return None
-    
-    elif player(board) == X:
-        arr = []
-        for action in actions(board):
-            arr.append((minimax_min_value(result(board,action)), action))
-        move = -math.inf
-        for pair in arr:
-            if pair[0] > move:
-                move = pair[0]
-            else:
-                move = move
-
-        for pair in arr:
-            if pair[0] == move:
-                return pair[1]
-
-    elif player(board) == O:
-        arr = []
-        for action in actions(board):
-            arr.append((minimax_max_value(result(board,action)), action))
-        move = math.inf
-        for pair in arr:
-            if pair[0] < move:
-                move = pair[0]
-            else:
-                move = move
-
-        for pair in arr:
-            if pair[0] == move:
-                return pair[1]
-
-    
\ No newline at end of file
+
+    # Ties are broken in the order actions() lists moves in
+    cells = [3 * i + j for i, j in actions(board)]
+    return divmod(bitboard.minimax(x, o, cells), 3)
@@ -0,0 +1,212 @@
+import argparse
+import os
+import random
+import signal
+import time
+
+import sat
+from logic import (And, Biconditional, Implication, Not, Or, Symbol,
+                   enumerate_check, model_check, solve)
+
+# Kinds of compound sentence to build random ones from, with how many
+# operands each takes
+CONNECTIVES = ((Not, 1), (And, None), (Or, None), (Implication, 2),
+               (Biconditional, 2))
+
+
+def random_sentence(rng, symbols, depth):
+    """
+    Returns a random sentence over symbols, nested at most depth deep.
+    """
+    if depth == 0 or rng.random() < 0.3:
+        return rng.choice(symbols)
+    connective, arity = rng.choice(CONNECTIVES)
+    if arity is None:
+        arity = rng.randint(1, 3)
+    return connective(*[random_sentence(rng, symbols, depth - 1)
+                        for _ in range(arity)])
+
+
+def check_model(sentence, symbols, satisfiable):
+    """
+    Checks that solve returns a model of sentence if it is satisfiable,
+    or None if not, raising an exception otherwise. Symbols the model
+    leaves out may take either value, so they are taken as false.
+    """
+    model = solve(sentence)
+    if (model is not None) != satisfiable:
+        raise Exception(f"solve returned {model} for {sentence.formula()}")
+    if model is not None:
+        model = {**{symbol.name: False for symbol in symbols}, **model}
+        if not sentence.evaluate(model):
+            raise Exception(f"solve returned {model}, which doesn't satisfy "
+                            f"{sentence.formula()}")
+
+
+class OutOfTime(Exception):
+    pass
+
+
+def out_of_time(signum, frame):
+    raise OutOfTime()
+
+
+def check_parity(count, seed):
+    """
+    Checks that model_check agrees with enumerating models on count
+    random knowledge bases and queries, and that solve finds a model of
+    the knowledge base without the query exactly when it isn't entailed,
+    raising an exception if either doesn't. Returns how many were
+    entailed.
+    """
+    rng = random.Random(seed)
+    entailed = 0
+    for i in range(count):
+        symbols = [Symbol(f"P{k}") for k in range(rng.randint(1, 6))]
+        knowledge = And(*[random_sentence(rng, symbols, 3)
+                          for _ in range(rng.randint(1, 4))])
+        query = random_sentence(rng, symbols, 2)
+        expected = enumerate_check(knowledge, query)
+        if model_check(knowledge, query) != expected:
+            raise Exception(f"{knowledge.formula()} entailing {query.formula()}: "
+                            f"expected {expected}")
+        check_model(And(knowledge, Not(query)), symbols, not expected)
+        entailed += expected
+    return entailed
+
+
+def chain(n):
+    """
+    Returns (knowledge, query) for a chain of n symbols, where each one
+    implies the next or a symbol known to be false, so that the first
+    entails the last.
+    """
+    symbols = [Symbol(f"P{k}") for k in range(n)]
+    others = [Symbol(f"Q{k}") for k in range(n)]
+    knowledge = And(symbols[0], *[
+        And(Implication(symbols[k], Or(symbols[k + 1], others[k])),
+            Biconditional(others[k], Not(Or(symbols[k], Not(symbols[k])))))
+        for k in range(n - 1)
+    ])
+    return knowledge, symbols[-1]
+
+
+def scaling(sizes, budget):
+    """
+    Times model_check and enumeration on chains of increasing length.
+    Enumeration is stopped after budget seconds, and left out of longer
+    chains from then on. Raises an exception if the two disagree.
+    """
+    print(f"{'symbols':>8}{'enumerate (ms)':>16}{'sat (ms)':>12}")
+    enumerating = True
+    for n in sizes:
+        knowledge, query = chain(n)
+        start = time.perf_counter()
+        result = model_check(knowledge, query)
+        fast = time.perf_counter() - start
+        slow_text = "-"
+        if enumerating:
+            signal.signal(signal.SIGALRM, out_of_time)
+            signal.setitimer(signal.ITIMER_REAL, budget)
+            start = time.perf_counter()
+            try:
+                if enumerate_check(knowledge, query) != result:
+                    raise Exception(f"model_check and enumeration disagree on a "
+                                    f"chain of {n}")
+                slow_text = f"{(time.perf_counter() - start) * 1000:.1f}"
+            except OutOfTime:
+                slow_text = f"> {budget * 1000:.0f}"
+                enumerating = False
+            finally:
+                signal.setitimer(signal.ITIMER_REAL, 0)
+        print(f"{n:>8}{slow_text:>16}{fast * 1000:>12.1f}")
+
+
+def satisfies(assignment, clauses):
+    return all(any(assignment[abs(literal)] == (1 if literal > 0 else -1)
+                   for literal in clause)
+               for clause in clauses)
+
+
+def compare_solvers(label, clauses, variables, budget):
+    """
+    Solves clauses with cdcl and, unless it runs out of budget seconds,
+    dpll, printing how long each took. Raises an exception if cdcl's
+    model doesn't satisfy clauses, or if the two disagree.
+    """
+    stats = sat.SolverStats()
+    start = time.perf_counter()
+    assignment = sat.cdcl(clauses, variables, stats)
+    fast = time.perf_counter() - start
+    if assignment is not None and not satisfies(assignment, clauses):
+        raise Exception(f"cdcl's model doesn't satisfy {label}")
+
+    signal.signal(signal.SIGALRM, out_of_time)
+    signal.setitimer(signal.ITIMER_REAL, budget)
+    start = time.perf_counter()
+    try:
+        if (sat.dpll(clauses, variables) is None) != (assignment is None):
+            raise Exception(f"dpll and cdcl disagree on {label}")
+        slow_text = f"{(time.perf_counter() - start) * 1000:.1f}"
+    except OutOfTime:
+        slow_text = f"> {budget * 1000:.0f}"
+    finally:
+        signal.setitimer(signal.ITIMER_REAL, 0)
+    print(f"{label:<24}{'sat' if assignment else 'unsat':>6}{slow_text:>12}"
+          f"{fast * 1000:>12.1f}{stats.conflicts:>10}{stats.learned:>9}"
+          f"{stats.deleted:>9}{stats.restarts:>9}")
+
+
+def random_3sat(variables, ratio, rng):
+    """Returns random clauses of 3 distinct variables each."""
+    return [[rng.choice((1, -1)) * v for v in rng.sample(range(1, variables + 1), 3)]
+            for _ in range(round(ratio * variables))]
+
+
+def solvers(filenames, sizes, budget, seed):
+    """
+    Compares dpll and cdcl on DIMACS files and on random 3-SAT at the
+    ratio of clauses to variables where it is hardest.
+    """
+    print(f"{'instance':<24}{'':>6}{'dpll (ms)':>12}{'cdcl (ms)':>12}"
+          f"{'conflicts':>10}{'learned':>9}{'deleted':>9}{'restarts':>9}")
+    for filename in filenames:
+        clauses, variables = sat.read_dimacs(filename)
+        compare_solvers(os.path.basename(filename), clauses, variables, budget)
+    rng = random.Random(seed)
+    for n in sizes:
+        compare_solvers(f"random 3-SAT, {n} vars", random_3sat(n, 4.26, rng), n,
+                        budget)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Check and time model_check and the SAT solvers."
+    )
+    parser.add_argument("-n", "--count", type=int, default=2000,
+                        help="number of random entailments to check")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--sizes", default="4,8,12,16,20,100,1000,10000",
+                        help="comma-separated lengths of chains to time")
+    parser.add_argument("--budget", type=float, default=5.0,
+                        help="seconds enumeration or dpll may take on one "
+                             "problem before it is stopped")
+    parser.add_argument("--dimacs", nargs="*", default=[], metavar="FILE",
+                        help="DIMACS CNF files to compare the solvers on")
+    parser.add_argument("--cnf-sizes", default="50,100,150,200",
+                        help="comma-separated numbers of variables of random "
+                             "3-SAT problems to compare the solvers on")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    entailed = check_parity(args.count, args.seed)
+    elapsed = time.perf_counter() - start
+    print(f"parity: {args.count} random entailments ({entailed} entailed) "
+          f"in {elapsed:.3f}s")
+    scaling([int(size) for size in args.sizes.split(",") if size], args.budget)
+    solvers(args.dimacs, [int(size) for size in args.cnf_sizes.split(",") if size],
+            args.budget, args.seed)
+
+
+if __name__ == "__main__":
+    main()
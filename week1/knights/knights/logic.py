@@ -1,5 +1,7 @@
 import itertools
 
+import sat
+
 
 class Sentence():
 
@@ -225,9 +227,140 @@ class Biconditional(Sentence):
         return set.union(self.left.symbols(), self.right.symbols())
 
 
+class CNF():
+    """
+    Clauses in conjunctive normal form that are satisfiable exactly when
+    the sentences added to them are, in the format sat solves.
+
+    Each symbol is a variable, and so is each compound sentence inside
+    another (a Tseitin variable), with clauses that make it true exactly
+    when that sentence is. The clauses grow linearly with the sentences,
+    where distributing Or over And would grow them exponentially.
+    """
+
+    def __init__(self):
+        self.clauses = []
+        self.symbols = {}
+        self.variables = 0
+        self.literals = {}
+        self.true = None
+
+    def variable(self):
+        """Returns a new variable."""
+        self.variables += 1
+        return self.variables
+
+    def constant(self, value):
+        """Returns a literal that is always value."""
+        if self.true is None:
+            self.true = self.variable()
+            self.clauses.append([self.true])
+        return self.true if value else -self.true
+
+    def literal(self, sentence):
+        """
+        Returns a literal that is true exactly when sentence is, adding
+        clauses for it.
+        """
+        if isinstance(sentence, Symbol):
+            if sentence.name not in self.symbols:
+                self.symbols[sentence.name] = self.variable()
+            return self.symbols[sentence.name]
+        if isinstance(sentence, Not):
+            return -self.literal(sentence.operand)
+        if sentence in self.literals:
+            return self.literals[sentence]
+
+        if isinstance(sentence, And):
+            parts = [self.literal(conjunct) for conjunct in sentence.conjuncts]
+            if not parts:
+                return self.constant(True)
+            v = self.variable()
+            self.clauses.extend([-v, part] for part in parts)
+            self.clauses.append([v] + [-part for part in parts])
+        elif isinstance(sentence, Or):
+            parts = [self.literal(disjunct) for disjunct in sentence.disjuncts]
+            if not parts:
+                return self.constant(False)
+            v = self.variable()
+            self.clauses.append([-v] + parts)
+            self.clauses.extend([v, -part] for part in parts)
+        elif isinstance(sentence, Implication):
+            a = self.literal(sentence.antecedent)
+            b = self.literal(sentence.consequent)
+            v = self.variable()
+            self.clauses.extend(([-v, -a, b], [v, a], [v, -b]))
+        elif isinstance(sentence, Biconditional):
+            a = self.literal(sentence.left)
+            b = self.literal(sentence.right)
+            v = self.variable()
+            self.clauses.extend(
+                ([-v, -a, b], [-v, a, -b], [v, a, b], [v, -a, -b])
+            )
+        else:
+            raise TypeError(f"can't convert {type(sentence).__name__} to CNF")
+        self.literals[sentence] = v
+        return v
+
+    def add(self, sentence):
+        """
+        Adds clauses that hold exactly when sentence does. Conjunctions
+        and disjunctions at the top are added as clauses themselves, with
+        no variables of their own.
+        """
+        if isinstance(sentence, And):
+            for conjunct in sentence.conjuncts:
+                self.add(conjunct)
+        elif isinstance(sentence, Or):
+            self.clauses.append(
+                [self.literal(disjunct) for disjunct in sentence.disjuncts]
+            )
+        else:
+            self.clauses.append([self.literal(sentence)])
+
+    def model(self, assignment):
+        """
+        Returns the model, from symbol names to values, of a solver's
+        assignment to the variables.
+        """
+        return {name: assignment[v] > 0 for name, v in self.symbols.items()}
+
+
 def model_check(knowledge, query):
     """Checks if knowledge base entails query."""
 
+    # Knowledge entails query exactly when knowledge without query is
+    # unsatisfiable, which a SAT solver decides without enumerating every
+    # model
+    cnf = CNF()
+    try:
+        cnf.add(knowledge)
+        cnf.add(Not(query))
+    except TypeError:
+        return enumerate_check(knowledge, query)
+    return sat.cdcl(cnf.clauses, cnf.variables) is None
+
+
+def solve(sentence):
+    """
+    Returns a model of sentence, a dictionary from each of its symbols to
+    a value that makes it true, or None if it is unsatisfiable.
+    """
+    cnf = CNF()
+    cnf.add(sentence)
+    assignment = sat.cdcl(cnf.clauses, cnf.variables)
+    if assignment is None:
+        return None
+    return cnf.model(assignment)
+
+
+def enumerate_check(knowledge, query):
+    """
+    Checks if knowledge base entails query, by evaluating both in every
+    model of their symbols. Works for any kind of Sentence, but takes
+    time exponential in the number of symbols.
+    """
+
     def check_all(knowledge, query, symbols, model):
         """Checks if knowledge base entails query, given a particular model."""
 
@@ -0,0 +1,569 @@
+"""
+Satisfiability of formulas in conjunctive normal form
+
+A formula is a list of clauses over variables numbered from 1, each
+clause a list of literals: v for variable v being true, -v for it being
+false, as in the DIMACS format.
+"""
+import heapq
+from array import array
+
+
+def dpll(clauses, variables):
+    """
+    Returns a satisfying assignment of the clauses over variables
+    variables, as a list where item v is the value of variable v (item 0
+    is unused), or None if the clauses are unsatisfiable.
+
+    Searches by the Davis-Putnam-Logemann-Loveland procedure: assigns
+    every literal that is the last unassigned one of an otherwise false
+    clause (unit propagation) and every literal whose negation appears in
+    no clause that isn't yet satisfied (pure literal elimination), then
+    decides on a variable and backtracks to try the other value of the
+    latest decision on a conflict.
+    """
+    # Values of variables: 1 for true, -1 for false, 0 for unassigned
+    value = [0] * (variables + 1)
+
+    # Clauses each literal appears in
+    occurrences = {}
+    for k, clause in enumerate(clauses):
+        if not clause:
+            return None
+        for literal in clause:
+            occurrences.setdefault(literal, []).append(k)
+
+    # Decide on the variables that appear most often first, with the
+    # value that satisfies more clauses
+    order = sorted(
+        range(1, variables + 1),
+        key=lambda v: -len(occurrences.get(v, ())) - len(occurrences.get(-v, ()))
+    )
+
+    # Literals in the order they were assigned, how many of them have
+    # been propagated, how many have been checked for making other
+    # literals pure, and (position in trail, literal, whether it is the
+    # second value tried, position in order) for every decision
+    trail = []
+    head = 0
+    checked = 0
+    decisions = []
+
+    def truth(literal):
+        return value[literal] if literal > 0 else -value[-literal]
+
+    def assign(literal):
+        value[abs(literal)] = 1 if literal > 0 else -1
+        trail.append(literal)
+
+    def propagate():
+        """
+        Assigns every literal implied by unit clauses, returning False on
+        a clause with every literal false.
+        """
+        nonlocal head
+        while head < len(trail):
+            literal = trail[head]
+            head += 1
+            for k in occurrences.get(-literal, ()):
+                unassigned = None
+                count = 0
+                for other in clauses[k]:
+                    t = truth(other)
+                    if t == 1:
+                        break
+                    if t == 0:
+                        unassigned = other
+                        count += 1
+                        if count > 1:
+                            break
+                else:
+                    if count == 0:
+                        return False
+                    assign(unassigned)
+        return True
+
+    def satisfied(k):
+        return any(truth(literal) == 1 for literal in clauses[k])
+
+    def eliminate_pure(candidates):
+        """
+        Assigns every unassigned candidate variable that appears with only
+        one sign in the clauses not yet satisfied.
+        """
+        for v in candidates:
+            if value[v]:
+                continue
+            positive = any(not satisfied(k) for k in occurrences.get(v, ()))
+            negative = any(not satisfied(k) for k in occurrences.get(-v, ()))
+            if positive != negative:
+                assign(v if positive else -v)
+
+    def newly_pure():
+        """
+        Returns the variables that may have become pure since last time:
+        those in clauses satisfied by the literals assigned since.
+        """
+        nonlocal checked
+        candidates = set()
+        for literal in trail[checked:]:
+            for k in occurrences.get(literal, ()):
+                candidates.update(abs(other) for other in clauses[k])
+        checked = len(trail)
+        return candidates
+
+    def undo(position):
+        nonlocal head, checked
+        while len(trail) > position:
+            value[abs(trail.pop())] = 0
+        head = checked = position
+
+    for clause in clauses:
+        if len(clause) == 1 and truth(clause[0]) != 1:
+            if truth(clause[0]) == -1:
+                return None
+            assign(clause[0])
+
+    consistent = propagate()
+    if consistent:
+        eliminate_pure(order)
+        checked = len(trail)
+        consistent = propagate()
+
+    # Every variable before this in order is assigned
+    cursor = 0
+    while True:
+        if consistent:
+            while checked < len(trail):
+                eliminate_pure(newly_pure())
+                consistent = propagate()
+                if not consistent:
+                    break
+        if consistent:
+            while cursor < len(order) and value[order[cursor]]:
+                cursor += 1
+            if cursor == len(order):
+                return value
+            v = order[cursor]
+            positive = len(occurrences.get(v, ())) >= len(occurrences.get(-v, ()))
+            literal = v if positive else -v
+            decisions.append((len(trail), literal, False, cursor))
+            assign(literal)
+            consistent = propagate()
+            continue
+
+        # Go back to the latest decision whose other value is untried
+        while decisions and decisions[-1][2]:
+            decisions.pop()
+        if not decisions:
+            return None
+        position, literal, _, cursor = decisions.pop()
+        undo(position)
+        decisions.append((position, -literal, True, cursor))
+        assign(-literal)
+        consistent = propagate()
+
+
+class SolverStats():
+    """
+    Opt-in counters describing the work cdcl did. Passing the same object
+    to several calls adds their counts together.
+    """
+
+    def __init__(self):
+        self.decisions = 0
+        self.propagations = 0
+        self.conflicts = 0
+        self.restarts = 0
+        self.learned = 0
+        self.deleted = 0
+
+    def as_dict(self):
+        return {
+            "decisions": self.decisions,
+            "propagations": self.propagations,
+            "conflicts": self.conflicts,
+            "restarts": self.restarts,
+            "learned": self.learned,
+            "deleted": self.deleted,
+        }
+
+
+def luby(i):
+    """Returns the ith term, from 1, of the Luby sequence 1 1 2 1 1 2 4 ..."""
+    while True:
+        k = i.bit_length()
+        if i == (1 << k) - 1:
+            return 1 << (k - 1)
+        i -= (1 << (k - 1)) - 1
+
+
+class Solver():
+    """
+    Conflict-driven clause learning SAT solver.
+
+    Literals are coded as 2 * v for variable v true and 2 * v + 1 for it
+    false, so that code ^ 1 negates one and codes index lists directly.
+    Clauses are stored one after another in a single int array, each as
+    its length followed by its literals, and referred to by offset. The
+    first two literals of each clause are the ones it is watching: the
+    clause is only looked at again when one of them becomes false.
+    """
+
+    # Conflicts between restarts, times the Luby sequence
+    RESTART_BASE = 100
+
+    # Factor variable activities grow by on every conflict, which is the
+    # same as decaying every other activity by its inverse
+    ACTIVITY_GROWTH = 1 / 0.95
+
+    def __init__(self, clauses, variables, stats=None):
+        self.variables = variables
+        self.stats = stats
+        self.arena = array("i")
+        self.learned = []
+        self.lbd = {}
+        self.watches = [[] for _ in range(2 * variables + 2)]
+
+        # Value of each literal code: 1 true, -1 false, 0 unassigned
+        self.values = [0] * (2 * variables + 2)
+        self.level = [0] * (variables + 1)
+        self.reason = [-1] * (variables + 1)
+        self.trail = []
+        self.trail_limits = []
+        self.head = 0
+
+        # Variables to decide on, most active first, as (-activity,
+        # variable) with stale entries skipped when popped, and the value
+        # each variable had last
+        self.activity = [0.0] * (variables + 1)
+        self.increment = 1.0
+        self.heap = [(0.0, v) for v in range(1, variables + 1)]
+        self.phase = [1] * (variables + 1)
+
+        self.consistent = True
+        for clause in clauses:
+            self.add_clause(clause)
+        self.max_learned = max(2000, len(clauses) // 3)
+
+    def add_clause(self, clause):
+        """Adds a clause of DIMACS literals, before solving."""
+        codes = set()
+        for literal in clause:
+            code = 2 * literal if literal > 0 else -2 * literal + 1
+            if code ^ 1 in codes:
+                return
+            codes.add(code)
+        codes = [code for code in codes if self.values[code] != -1]
+        if any(self.values[code] == 1 for code in codes):
+            return
+        if not codes:
+            self.consistent = False
+        elif len(codes) == 1:
+            self.enqueue(codes[0], -1)
+            self.consistent = self.consistent and self.propagate() == -1
+        else:
+            self.attach(codes)
+
+    def attach(self, codes):
+        """Stores a clause and watches its first two literals."""
+        offset = len(self.arena)
+        self.arena.append(len(codes))
+        self.arena.extend(codes)
+        self.watches[codes[0]].append(offset)
+        self.watches[codes[1]].append(offset)
+        return offset
+
+    def enqueue(self, code, reason):
+        v = code >> 1
+        self.values[code] = 1
+        self.values[code ^ 1] = -1
+        self.level[v] = len(self.trail_limits)
+        self.reason[v] = reason
+        self.trail.append(code)
+
+    def propagate(self):
+        """
+        Makes every assignment implied by the ones not yet propagated,
+        returning the offset of a clause with every literal false, or -1.
+        """
+        arena = self.arena
+        values = self.values
+        watches = self.watches
+        while self.head < len(self.trail):
+            false = self.trail[self.head] ^ 1
+            self.head += 1
+            if self.stats is not None:
+                self.stats.propagations += 1
+            watching = watches[false]
+            kept = 0
+            i = 0
+            count = len(watching)
+            while i < count:
+                offset = watching[i]
+                i += 1
+
+                # Keep the false literal second
+                if arena[offset + 1] == false:
+                    arena[offset + 1] = arena[offset + 2]
+                    arena[offset + 2] = false
+                first = arena[offset + 1]
+                if values[first] == 1:
+                    watching[kept] = offset
+                    kept += 1
+                    continue
+
+                # Watch another literal that isn't false, if there is one
+                end = offset + 1 + arena[offset]
+                for k in range(offset + 3, end):
+                    other = arena[k]
+                    if values[other] != -1:
+                        arena[offset + 2] = other
+                        arena[k] = false
+                        watches[other].append(offset)
+                        break
+                else:
+                    watching[kept] = offset
+                    kept += 1
+                    if values[first] == -1:
+                        # Conflict: keep the rest of the watches as they were
+                        while i < count:
+                            watching[kept] = watching[i]
+                            kept += 1
+                            i += 1
+                        del watching[kept:]
+                        return offset
+                    self.enqueue(first, offset)
+            del watching[kept:]
+        return -1
+
+    def bump(self, v):
+        self.activity[v] += self.increment
+        if self.activity[v] > 1e100:
+            for u in range(1, self.variables + 1):
+                self.activity[u] *= 1e-100
+            self.increment *= 1e-100
+            self.heap = [(-self.activity[u], u) for u in range(1, self.variables + 1)
+                         if not self.values[2 * u]]
+            heapq.heapify(self.heap)
+        elif not self.values[2 * v]:
+            heapq.heappush(self.heap, (-self.activity[v], v))
+
+    def analyze(self, conflict):
+        """
+        Returns (learned clause, level to jump back to) for a conflict,
+        cutting the implication graph at the first unique implication
+        point: the clause holds exactly one literal assigned at the
+        current level, which it goes first.
+        """
+        arena = self.arena
+        seen = self.seen
+        current = len(self.trail_limits)
+        learned = [0]
+        pending = 0
+        code = -1
+        index = len(self.trail) - 1
+        offset = conflict
+        while True:
+            start = offset + 1 if code == -1 else offset + 2
+            for k in range(start, offset + 1 + arena[offset]):
+                other = arena[k]
+                v = other >> 1
+                if not seen[v] and self.level[v] > 0:
+                    seen[v] = True
+                    self.bump(v)
+                    if self.level[v] >= current:
+                        pending += 1
+                    else:
+                        learned.append(other)
+            while not seen[self.trail[index] >> 1]:
+                index -= 1
+            code = self.trail[index]
+            index -= 1
+            offset = self.reason[code >> 1]
+            seen[code >> 1] = False
+            pending -= 1
+            if pending == 0:
+                break
+        learned[0] = code ^ 1
+
+        # Drop literals implied by the others in the clause
+        kept = [learned[0]]
+        for other in learned[1:]:
+            reason = self.reason[other >> 1]
+            if reason == -1 or any(
+                not seen[arena[k] >> 1] and self.level[arena[k] >> 1] > 0
+                for k in range(reason + 2, reason + 1 + arena[reason])
+            ):
+                kept.append(other)
+        for other in learned[1:]:
+            seen[other >> 1] = False
+        self.increment *= self.ACTIVITY_GROWTH
+
+        if len(kept) == 1:
+            return kept, 0
+        # Put the literal assigned last, besides the first, second
+        deepest = max(range(1, len(kept)), key=lambda k: self.level[kept[k] >> 1])
+        kept[1], kept[deepest] = kept[deepest], kept[1]
+        return kept, self.level[kept[1] >> 1]
+
+    def backtrack(self, level):
+        """Takes back every assignment made after level."""
+        if len(self.trail_limits) <= level:
+            return
+        position = self.trail_limits[level]
+        for code in self.trail[position:]:
+            v = code >> 1
+            self.values[code] = self.values[code ^ 1] = 0
+            self.reason[v] = -1
+            self.phase[v] = code & 1
+            heapq.heappush(self.heap, (-self.activity[v], v))
+        del self.trail[position:]
+        del self.trail_limits[level:]
+        self.head = position
+
+    def decide(self):
+        """Returns the most active unassigned variable, or None."""
+        while self.heap:
+            _, v = heapq.heappop(self.heap)
+            if not self.values[2 * v]:
+                return v
+        return None
+
+    def reduce(self):
+        """
+        Deletes the less useful half of the learned clauses, those whose
+        literals span the most decision levels, and compacts the arena.
+        Only called at level 0, where no clause is the reason for an
+        assignment that analysis will look at.
+        """
+        ranked = sorted(self.learned, key=lambda offset: self.lbd[offset])
+        keep = len(ranked) // 2
+        kept = set(ranked[:keep])
+        kept.update(offset for offset in ranked[keep:] if self.lbd[offset] <= 2)
+        if self.stats is not None:
+            self.stats.deleted += len(ranked) - len(kept)
+
+        arena = self.arena
+        self.arena = array("i")
+        self.watches = [[] for _ in range(2 * self.variables + 2)]
+        learned, lbd = [], {}
+        offset = 0
+        while offset < len(arena):
+            size = arena[offset]
+            end = offset + 1 + size
+            if offset in self.lbd and offset not in kept:
+                offset = end
+                continue
+            moved = self.attach(arena[offset + 1:end])
+            if offset in self.lbd:
+                learned.append(moved)
+                lbd[moved] = self.lbd[offset]
+            offset = end
+        self.learned, self.lbd = learned, lbd
+        for v in range(1, self.variables + 1):
+            self.reason[v] = -1
+        self.max_learned = int(self.max_learned * 1.1)
+
+    def solve(self):
+        """
+        Returns the value of each variable in a satisfying assignment, as
+        a list where item v is 1 or -1 (item 0 is unused), or None if the
+        clauses are unsatisfiable.
+        """
+        if not self.consistent or self.propagate() != -1:
+            return None
+        self.seen = [False] * (self.variables + 1)
+        restarts = 1
+        conflicts = 0
+        limit = self.RESTART_BASE * luby(restarts)
+        while True:
+            conflict = self.propagate()
+            if conflict != -1:
+                if self.stats is not None:
+                    self.stats.conflicts += 1
+                if not self.trail_limits:
+                    return None
+                conflicts += 1
+                clause, level = self.analyze(conflict)
+                self.backtrack(level)
+                if len(clause) == 1:
+                    self.enqueue(clause[0], -1)
+                else:
+                    offset = self.attach(clause)
+                    self.learned.append(offset)
+                    self.lbd[offset] = len({self.level[code >> 1] for code in clause})
+                    self.enqueue(clause[0], offset)
+                    if self.stats is not None:
+                        self.stats.learned += 1
+                continue
+
+            if conflicts >= limit:
+                self.backtrack(0)
+                restarts += 1
+                conflicts = 0
+                limit = self.RESTART_BASE * luby(restarts)
+                if self.stats is not None:
+                    self.stats.restarts += 1
+                if len(self.learned) > self.max_learned:
+                    self.reduce()
+                continue
+
+            v = self.decide()
+            if v is None:
+                return [0] + [self.values[2 * v] for v in range(1, self.variables + 1)]
+            if self.stats is not None:
+                self.stats.decisions += 1
+            self.trail_limits.append(len(self.trail))
+            self.enqueue(2 * v + self.phase[v], -1)
+
+
+def cdcl(clauses, variables, stats=None):
+    """
+    Returns a satisfying assignment of the clauses over variables
+    variables, in the same form as dpll, or None if they are
+    unsatisfiable, by conflict-driven clause learning. Records its work
+    in stats, a SolverStats, if given.
+    """
+    return Solver(clauses, variables, stats).solve()
+
+
+def read_dimacs(filename):
+    """
+    Returns (clauses, variables) from a DIMACS CNF file.
+    """
+    clauses = []
+    variables = None
+    clause = []
+    with open(filename) as f:
+        for line in f:
+            line = line.strip()
+            if not line or line[0] == "c":
+                continue
+            if line[0] == "p":
+                fields = line.split()
+                if len(fields) != 4 or fields[1] != "cnf":
+                    raise Exception(f"bad problem line {line!r}")
+                variables = int(fields[2])
+                continue
+            if line[0] == "%":
+                break
+            for literal in map(int, line.split()):
+                if literal == 0:
+                    clauses.append(clause)
+                    clause = []
+                else:
+                    clause.append(literal)
+    if clause:
+        clauses.append(clause)
+    if variables is None:
+        raise Exception("missing problem line")
+    return clauses, variables
+
+
+def write_dimacs(filename, clauses, variables):
+    """Writes clauses over variables variables to a DIMACS CNF file."""
+    with open(filename, "w") as f:
+        f.write(f"p cnf {variables} {len(clauses)}\n")
+        for clause in clauses:
+            f.write(" ".join(map(str, clause)) + " 0\n")